@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import aiohttp
+from aiogram.types import Update
+from app.api.webhook import SECRET_HEADER, is_telegram_request
+from app.bot.create_bot import bot, dp, get_routers
+from app.bot.update_queue import get_partition_key
+from app.config import settings, setup_logger
+from app.dao.dao import WorkerStatusDAO
+from app.dao.database import async_session_maker
+from fastapi import FastAPI, Request, Response
+from loguru import logger
+
+
+class WorkerPool:
+    """Процессы воркеров webhook-приложения под присмотром супервизора.
+
+    Воркер с индексом i слушает 127.0.0.1:WEBHOOK_PORT + 1 + i. Апдейт
+    уходит воркеру с номером partition_key % workers, поэтому апдейты
+    одного чата всегда обрабатывает один процесс и его UpdateQueue
+    сохраняет их порядок. Упавший воркер перезапускается.
+    """
+
+    def __init__(self, workers: int, restart_delay: float = 1):
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self._processes: list[asyncio.subprocess.Process | None] = [None] * workers
+        self._monitors: list[asyncio.Task] = []
+        self._http: aiohttp.ClientSession | None = None
+        self._stopping = False
+
+    @staticmethod
+    def port(index: int) -> int:
+        return settings.WEBHOOK_PORT + 1 + index
+
+    def worker_for(self, update: Update) -> int:
+        return get_partition_key(update) % self.workers
+
+    async def start(self) -> None:
+        self._http = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=settings.WEBHOOK_PUT_TIMEOUT + 5)
+        )
+        self._monitors = [
+            asyncio.create_task(self._monitor(index))
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for process in self._processes:
+            if process is not None and process.returncode is None:
+                process.terminate()
+        await asyncio.gather(*self._monitors, return_exceptions=True)
+        if self._http is not None:
+            await self._http.close()
+
+    async def forward(self, update: Update, body: bytes) -> int:
+        """Передает апдейт воркеру его чата и возвращает код ответа."""
+        index = self.worker_for(update)
+        try:
+            async with self._http.post(
+                f'http://127.0.0.1:{self.port(index)}/webhook',
+                data=body,
+                headers={
+                    'Content-Type': 'application/json',
+                    SECRET_HEADER: settings.WEBHOOK_SECRET
+                }
+            ) as response:
+                return response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f'Worker {index} is unavailable: {e!r}')
+            # Telegram повторит доставку апдейта позже.
+            return 503
+
+    async def _monitor(self, index: int) -> None:
+        while not self._stopping:
+            process = self._processes[index] = await asyncio.create_subprocess_exec(
+                sys.executable, '-m', 'uvicorn', 'app.api.webhook:app',
+                '--host', '127.0.0.1', '--port', str(self.port(index)),
+                env={
+                    **os.environ,
+                    'WORKER_INDEX': str(index),
+                    # Случайный секрет супервизора должен совпасть у воркеров.
+                    'WEBHOOK_SECRET': settings.WEBHOOK_SECRET
+                }
+            )
+            logger.info(f'Worker {index} started, pid {process.pid}')
+            if self._stopping:
+                process.terminate()
+            try:
+                returncode = await process.wait()
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+            if not self._stopping:
+                logger.error(
+                    f'Worker {index} exited with code {returncode}, restarting'
+                )
+                await asyncio.sleep(self.restart_delay)
+
+
+pool = WorkerPool(settings.WORKERS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logger()
+    # Webhook ставит и снимает только супервизор, а не каждый воркер.
+    dp.include_routers(*get_routers())
+    await pool.start()
+    await bot.set_webhook(
+        url=settings.hook_url,
+        allowed_updates=dp.resolve_used_update_types(),
+        drop_pending_updates=True,
+        secret_token=settings.WEBHOOK_SECRET
+    )
+    logger.info(
+        f'Webhook установлен на {settings.hook_url}, '
+        f'воркеров: {settings.WORKERS}'
+    )
+    yield
+    await bot.delete_webhook()
+    await pool.stop()
+    await bot.session.close()
+    logger.info('Webhook удален, воркеры остановлены.')
+    await logger.complete()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post('/webhook')
+async def webhook(request: Request) -> Response:
+    """Передает апдейт воркеру, который обслуживает его чат."""
+    if not is_telegram_request(request):
+        return Response(status_code=403)
+    body = await request.body()
+    update = Update.model_validate_json(body)
+    return Response(status_code=await pool.forward(update, body))
+
+
+@app.get('/workers')
+async def workers() -> list[dict]:
+    """Пульс и пропускная способность всех живых воркеров."""
+    async with async_session_maker() as session:
+        statuses = await WorkerStatusDAO(session).find_all_alive(
+            settings.LEASE_TTL
+        )
+    return [status.to_dict() for status in statuses]
@@ -0,0 +1,94 @@
+import secrets
+from contextlib import asynccontextmanager
+
+from aiogram.types import Update
+from app.bot.create_bot import (bot, database_middleware, dp,
+                                notification_sender, start_bot)
+from app.bot.update_queue import UpdateQueue
+from app.bot.workers import WorkerCoordinator
+from app.config import get_broker, settings
+from app.dao.dao import WorkerStatusDAO
+from app.dao.database import async_session_maker
+from app.metrics import registry
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
+from loguru import logger
+
+update_queue = UpdateQueue(
+    dp,
+    bot,
+    concurrency=settings.UPDATE_CONCURRENCY,
+    maxsize=settings.WEBHOOK_QUEUE_SIZE,
+    put_timeout=settings.WEBHOOK_PUT_TIMEOUT
+)
+coordinator = WorkerCoordinator(database_middleware, update_queue)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def is_telegram_request(request: Request) -> bool:
+    """Проверяет секрет, переданный Telegram при установке webhook."""
+    return secrets.compare_digest(
+        request.headers.get(SECRET_HEADER, ''),
+        settings.WEBHOOK_SECRET
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_bot()
+    coordinator.start()
+    # Под супервизором webhook ставит он, а воркер только принимает апдейты.
+    owns_webhook = settings.WORKER_INDEX is None
+    if owns_webhook:
+        await bot.set_webhook(
+            url=settings.hook_url,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True,
+            secret_token=settings.WEBHOOK_SECRET
+        )
+        logger.info(f'Webhook установлен на {settings.hook_url}')
+    yield
+    if owns_webhook:
+        await bot.delete_webhook()
+    await update_queue.stop()
+    await dp.storage.close()
+    await coordinator.stop()
+    # Сначала досылаем уведомления, чтобы их сообщения успели
+    # подтвердиться, и только потом закрываем брокер.
+    await notification_sender.join()
+    await get_broker().close()
+    await bot.session.close()
+    logger.info('Бот остановлен.')
+    await logger.complete()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post('/webhook')
+async def webhook(request: Request) -> Response:
+    """Принимает апдейт, ставит его в очередь и сразу отвечает Telegram."""
+    if not is_telegram_request(request):
+        return Response(status_code=403)
+    update = Update.model_validate(await request.json(), context={'bot': bot})
+    if not await update_queue.put(update):
+        # Telegram повторит доставку апдейта позже.
+        return Response(status_code=503)
+    return Response(status_code=200)
+
+
+@app.get('/workers')
+async def workers() -> list[dict]:
+    """Пульс и пропускная способность всех живых воркеров."""
+    async with async_session_maker() as session:
+        statuses = await WorkerStatusDAO(session).find_all_alive(
+            settings.LEASE_TTL
+        )
+    return [status.to_dict() for status in statuses]
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Гистограммы задержек в формате Prometheus."""
+    return registry.render_prometheus()
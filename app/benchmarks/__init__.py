@@ -0,0 +1,48 @@
+"""Бенчмарки отдельных оптимизаций, каждый запускается как модуль:
+
+    python -m app.benchmarks.sweep --sizes 10000 100000
+
+Импорт пакета подставляет временные DB_URL/STORE_URL и заглушки
+обязательных настроек, поэтому модули бенчмарков импортируют его раньше
+app.config. Сценарий бронирования целиком гоняет app.loadtest.
+"""
+import os
+import sys
+import tempfile
+
+from app.env_defaults import set_env_defaults
+from loguru import logger
+
+bench_dir = tempfile.mkdtemp(prefix='booking_bench_')
+set_env_defaults(bench_dir, BOT_TOKEN='42:BENCHMARK', LOG_LEVEL='WARNING')
+# Без setup_logger у loguru остается DEBUG-вывод в stderr по умолчанию.
+logger.remove()
+logger.add(sys.stderr, level=os.environ['LOG_LEVEL'])
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def latency_summary(values: list[float]) -> str:
+    """p50/p95/p99 в миллисекундах."""
+    return (
+        f'p50 {percentile(values, 0.5) * 1000:7.2f} ms  '
+        f'p95 {percentile(values, 0.95) * 1000:7.2f} ms  '
+        f'p99 {percentile(values, 0.99) * 1000:7.2f} ms'
+    )
+
+
+async def create_engine(path: str, pragmas: bool = True):
+    """Движок на отдельном SQLite-файле со схемой из моделей."""
+    from app.dao.database import Base, set_sqlite_pragmas
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    if pragmas:
+        event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return engine
@@ -0,0 +1,139 @@
+"""Рассылка Broadcaster через фейковый Bot API сервер.
+
+aiohttp-сервер отвечает на /bot{token}/sendMessage с задержкой --latency,
+каждому --blocked-every чату отвечает 403, а с вероятностью --flood
+отвечает 429 с retry_after 1. Bot ходит в него через
+TelegramAPIServer.from_base, получатели - --users строк users в базе
+бенчмарка, лимиты - TELEGRAM_GLOBAL_RATE и TELEGRAM_CHAT_INTERVAL.
+Сервер записывает время каждого запроса: печатаются наибольшее число
+запросов за скользящую секунду и наименьший интервал между запросами
+в один чат (он есть только у повторов после 429).
+
+    python -m app.benchmarks.broadcast --users 1000 --latency 0.05 --flood 0.01
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from app.bot.broadcast import Broadcaster
+from app.bot.rate_limit import TelegramRateLimiter
+from app.config import settings
+from app.dao.database import Base, engine
+from app.dao.models import User
+from sqlalchemy import insert
+
+
+class FakeBotAPI:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.requests: dict[int, list[float]] = defaultdict(list)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        chat_id = int(form['chat_id'])
+        self.requests[chat_id].append(time.monotonic())
+        await asyncio.sleep(self.args.latency)
+        if self.args.blocked_every and chat_id % self.args.blocked_every == 0:
+            return web.json_response({
+                'ok': False, 'error_code': 403,
+                'description': 'Forbidden: bot was blocked by the user',
+            }, status=403)
+        if self.rng.random() < self.args.flood:
+            return web.json_response({
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            }, status=429)
+        return web.json_response({'ok': True, 'result': {
+            'message_id': len(self.requests[chat_id]),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': form['text'],
+        }})
+
+    def peak_rate(self) -> int:
+        """Наибольшее число запросов за скользящее окно в одну секунду."""
+        moments = sorted(
+            moment for chat in self.requests.values() for moment in chat
+        )
+        peak = start = 0
+        for end, moment in enumerate(moments):
+            while moment - moments[start] >= 1:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+    def min_chat_interval(self) -> float | None:
+        intervals = [
+            later - earlier
+            for chat in self.requests.values()
+            for earlier, later in zip(chat, chat[1:])
+        ]
+        return min(intervals) if intervals else None
+
+
+async def main(args) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [
+            {'id': user_id} for user_id in range(1, args.users + 1)
+        ])
+    api = FakeBotAPI(args)
+    web_app = web.Application()
+    web_app.router.add_post('/bot{token}/sendMessage', api.send_message)
+    runner = web.AppRunner(web_app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.port).start()
+    bot = Bot(settings.BOT_TOKEN, session=AiohttpSession(
+        api=TelegramAPIServer.from_base(f'http://127.0.0.1:{args.port}')
+    ))
+    limiter = TelegramRateLimiter(
+        global_rate=settings.TELEGRAM_GLOBAL_RATE,
+        per_chat_interval=settings.TELEGRAM_CHAT_INTERVAL
+    )
+    broadcaster = Broadcaster(
+        bot,
+        limiter,
+        concurrency=settings.BROADCAST_CONCURRENCY,
+        chunk_size=settings.BROADCAST_CHUNK
+    )
+    try:
+        stats = await broadcaster.run('Бенчмарк рассылки')
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+        await engine.dispose()
+    min_interval = api.min_chat_interval()
+    print(f'{args.users} users, latency {args.latency * 1000:.0f} ms, '
+          f'flood {args.flood:.1%}, limits {settings.TELEGRAM_GLOBAL_RATE:g} '
+          f'msg/s and {settings.TELEGRAM_CHAT_INTERVAL:g}s per chat, '
+          f'concurrency {settings.BROADCAST_CONCURRENCY}')
+    print(f'elapsed {stats.elapsed:.1f}s, {stats.sent / stats.elapsed:.1f} sent/s')
+    print(json.dumps({
+        'total': stats.total, 'sent': stats.sent, 'blocked': stats.blocked,
+        'failed': stats.failed, 'retries': stats.retries,
+    }))
+    print(f'server: {sum(map(len, api.requests.values()))} requests, '
+          f'peak {api.peak_rate()} per 1s window, min per-chat interval '
+          f'{"-" if min_interval is None else f"{min_interval:.2f}s"}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--flood', type=float, default=0.01)
+    parser.add_argument('--blocked-every', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8081)
+    asyncio.run(main(parser.parse_args()))
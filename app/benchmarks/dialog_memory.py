@@ -0,0 +1,112 @@
+"""Память 10k открытых диалогов бронирования: ORM-объекты против снимков.
+
+Для каждого диалога в своей сессии загружаются столы нужной вместимости
+и слоты, и собирается dialog_data на шаге подтверждения: как раньше, с
+ORM-объектами, и как сейчас, со снимками STable/SSlot. Печатается
+удерживаемая память по tracemalloc и размер dialog_data в JSON.
+
+    python -m app.benchmarks.dialog_memory --dialogs 10000
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from app.benchmarks import bench_dir, create_engine
+from app.bot.booking.schemas import SSlot, STable
+from app.dao.models import Table, TimeSlot
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+TABLES = 60
+BOOKING_DATE = date.today() + timedelta(days=1)
+
+
+def orm_dialog(capacity: int, tables: list, slots: list) -> dict:
+    return {
+        'capacity': capacity,
+        'tables': tables,
+        'selected_table': tables[0],
+        'booking_date': BOOKING_DATE,
+        'slots': slots,
+        'selected_slot': slots[0],
+    }
+
+
+def snapshot_dialog(capacity: int, tables: list, slots: list) -> dict:
+    slot_snapshots = [SSlot.model_validate(slot).model_dump() for slot in slots]
+    return {
+        'capacity': capacity,
+        'tables': [STable.model_validate(table).model_dump() for table in tables],
+        'selected_table': STable.model_validate(tables[0]).model_dump(),
+        'booking_date': BOOKING_DATE.isoformat(),
+        'slots': slot_snapshots,
+        'selected_slot': slot_snapshots[0],
+    }
+
+
+async def open_dialogs(session_maker, build, count: int) -> list[dict]:
+    dialogs = []
+    for index in range(count):
+        capacity = index % 6 + 1
+        async with session_maker() as session:
+            tables = (await session.execute(
+                select(Table).where(Table.capacity == capacity)
+            )).scalars().all()
+            slots = (await session.execute(
+                select(TimeSlot).order_by(TimeSlot.id)
+            )).scalars().all()
+        dialogs.append(build(capacity, list(tables), list(slots)))
+    return dialogs
+
+
+async def measure(session_maker, name: str, build, count: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    dialogs = await open_dialogs(session_maker, build, count)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    try:
+        state_size = f'{len(json.dumps(dialogs[0]))} B JSON'
+    except TypeError:
+        state_size = 'not JSON-serialisable'
+    print(f'{name:>9}: {retained / 2 ** 20:7.1f} MB retained, '
+          f'{retained / count / 1024:5.1f} KB/dialog, {state_size}, '
+          f'built in {elapsed:.1f}s')
+    del dialogs
+
+
+async def main(args) -> None:
+    engine = await create_engine(os.path.join(bench_dir, 'dialogs.sqlite3'))
+    async with engine.begin() as connection:
+        await connection.execute(insert(Table), [
+            {'id': table_id, 'capacity': table_id % 6 + 1,
+             'description': f'Стол {table_id} у окна'}
+            for table_id in range(1, TABLES + 1)
+        ])
+        await connection.execute(insert(TimeSlot), [
+            {'id': hour, 'start_time': f'{hour:02d}:00',
+             'end_time': f'{hour + 1:02d}:00'}
+            for hour in range(10, 22)
+        ])
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    print(f'{args.dialogs} dialogs, {TABLES // 6} tables and 12 slots each')
+    await measure(session_maker, 'orm', orm_dialog, args.dialogs)
+    await measure(session_maker, 'snapshot', snapshot_dialog, args.dialogs)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dialogs', type=int, default=10000)
+    asyncio.run(main(parser.parse_args()))
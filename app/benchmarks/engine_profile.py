@@ -0,0 +1,108 @@
+"""Пропускная способность SQLite с профилем движка и без него.
+
+Concurrency диалогов параллельно читают свободные слоты стола на дату и
+с вероятностью --write-ratio бронируют слот, каждый шаг в своей сессии,
+как апдейт в DatabaseMiddleware. Прогон без профиля использует
+настройки SQLite по умолчанию, с профилем - pragma из SQLITE_PRAGMAS.
+
+    python -m app.benchmarks.engine_profile --ops 5000 --concurrency 50
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from app.benchmarks import bench_dir, create_engine, latency_summary
+from app.dao.dao import BookingDAO, TableDAO, TimeSlotUserDAO
+from app.dao.models import Table, TimeSlot, User
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+TABLES = 30
+SLOTS = range(10, 22)
+DAYS = 14
+
+
+async def seed(engine, users: int) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(insert(User), [
+            {'id': user_id} for user_id in range(1, users + 1)
+        ])
+        await connection.execute(insert(Table), [
+            {'id': table_id, 'capacity': 4}
+            for table_id in range(1, TABLES + 1)
+        ])
+        await connection.execute(insert(TimeSlot), [
+            {'id': slot, 'start_time': f'{slot:02d}:00',
+             'end_time': f'{slot + 1:02d}:00'}
+            for slot in SLOTS
+        ])
+
+
+async def run(profile: bool, args) -> None:
+    name = 'profile' if profile else 'default'
+    engine = await create_engine(
+        os.path.join(bench_dir, f'engine_{name}.sqlite3'), pragmas=profile
+    )
+    await seed(engine, args.concurrency)
+    for dao in (TableDAO, TimeSlotUserDAO):
+        dao.invalidate_cache()
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    rng = random.Random(args.seed)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    remaining = iter(range(args.ops))
+
+    async def dialog(user_id: int) -> None:
+        for _ in remaining:
+            table_id = rng.randint(1, TABLES)
+            day = date.today() + timedelta(days=rng.randrange(DAYS))
+            kind = 'write' if rng.random() < args.write_ratio else 'read'
+            started = time.perf_counter()
+            try:
+                async with session_maker() as session:
+                    dao = BookingDAO(session)
+                    if kind == 'read':
+                        await dao.get_available_time_slots(table_id, day)
+                    else:
+                        await dao.reserve_slot(
+                            user_id, table_id, day, rng.choice(SLOTS)
+                        )
+                        await session.commit()
+            except OperationalError:
+                errors[kind] += 1
+                continue
+            latencies[kind].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        dialog(user_id) for user_id in range(1, args.concurrency + 1)
+    ))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    done = sum(map(len, latencies.values()))
+    print(f'{name}: {done / elapsed:8.1f} ops/s, '
+          f'errors: read {errors["read"]}, write {errors["write"]}')
+    for kind in ('read', 'write'):
+        print(f'  {kind:>5}: {latency_summary(latencies[kind])}  '
+              f'n={len(latencies[kind])}')
+
+
+async def main(args) -> None:
+    for profile in (False, True):
+        await run(profile, args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""Пропускная способность FSM-хранилищ: MemoryStorage и SQLAlchemyStorage.
+
+Каждый апдейт, как шаг aiogram_dialog, читает и пишет состояние и данные
+контекста диалога и его стека (данные около 2 КБ JSON). Апдейты идут
+через FSMFlushMiddleware, как в боте. SQLAlchemyStorage меряется с
+буферизацией (flush_interval 0.5 с) и с записью после каждого апдейта
+(flush_interval 0).
+
+    python -m app.benchmarks.fsm_storage --users 1000 --steps 6
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import os
+import time
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from app.benchmarks import bench_dir, create_engine, latency_summary
+from app.dao.fsm_storage import FSMFlushMiddleware, SQLAlchemyStorage
+
+DIALOG_DATA = {
+    'capacity': 4,
+    'booking_date': '2030-01-01',
+    'selected_table': {'id': 7, 'capacity': 4, 'description': 'Стол у окна'},
+    'slots': [
+        {'id': hour, 'start_time': f'{hour:02d}:00',
+         'end_time': f'{hour + 1:02d}:00'}
+        for hour in range(10, 22)
+    ],
+}
+
+
+async def step(storage: BaseStorage, user_id: int, index: int) -> None:
+    context = StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+    stack = StorageKey(
+        bot_id=42, chat_id=user_id, user_id=user_id, destiny='aiogd_stack'
+    )
+    await storage.get_state(context)
+    data = await storage.get_data(context)
+    await storage.get_data(stack)
+    await storage.set_state(context, f'BookingState:step{index}')
+    await storage.set_data(context, {**data, **DIALOG_DATA, 'step': index})
+    await storage.set_data(stack, {'intents': [f'intent{user_id}'], 'step': index})
+
+
+async def run(name: str, storage: BaseStorage, args) -> None:
+    middleware = (
+        FSMFlushMiddleware(storage)
+        if isinstance(storage, SQLAlchemyStorage) else None
+    )
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def update(user_id: int, index: int) -> None:
+        async def handler(event, data):
+            await step(storage, user_id, index)
+
+        started = time.perf_counter()
+        if middleware is not None:
+            await middleware(handler, None, {})
+        else:
+            await handler(None, {})
+        latencies.append(time.perf_counter() - started)
+
+    async def user(user_id: int) -> None:
+        for index in range(args.steps):
+            async with semaphore:
+                await update(user_id, index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(user_id) for user_id in range(1, args.users + 1)))
+    await storage.close()
+    elapsed = time.perf_counter() - started
+    print(f'{name:>22}: {len(latencies) / elapsed:8.1f} updates/s  '
+          f'{latency_summary(latencies)}')
+
+
+async def main(args) -> None:
+    print(f'{args.users} users x {args.steps} updates, '
+          f'concurrency {args.concurrency}')
+    await run('MemoryStorage', MemoryStorage(), args)
+    for flush_interval in (0.5, 0):
+        engine = await create_engine(
+            os.path.join(bench_dir, f'fsm_{flush_interval}.sqlite3')
+        )
+        await run(
+            f'SQLAlchemyStorage({flush_interval})',
+            SQLAlchemyStorage(engine, flush_interval=flush_interval),
+            args
+        )
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=6)
+    parser.add_argument('--concurrency', type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
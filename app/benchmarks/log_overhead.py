@@ -0,0 +1,108 @@
+"""Задержка обработчика с выключенным и включенным логированием.
+
+Обработчик, как хендлер бота: своя сессия, UserDAO.find_one_or_none_by_id
+(пишет DEBUG) и logger.info с f-строкой. --handlers обработчиков идут по
+--concurrency одновременно при LOG_LEVEL DEBUG в трех конфигурациях:
+- off: без sink'ов;
+- sync: прежняя настройка, stderr и файл пишутся прямо в event loop;
+- setup_logging: enqueued sink'и и LogRateLimiter, текстом и JSON.
+stderr на время замеров направлен в /dev/null, файлы лежат в bench_dir.
+drain - время, за которое фоновый поток дописывает очередь после замера.
+
+    python -m app.benchmarks.log_overhead --handlers 20000 --concurrency 50
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from app.benchmarks import bench_dir, create_engine, latency_summary
+from app.config import settings
+from app.dao.dao import UserDAO
+from app.dao.models import User
+from app.log import setup_logging
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+USERS = 1000
+
+
+def sync_sinks(log_settings, path: str) -> None:
+    logger.remove()
+    logger.add(sys.stderr, level=log_settings.LOG_LEVEL)
+    logger.add(
+        path,
+        format=log_settings.FORMAT_LOG,
+        level=log_settings.LOG_LEVEL,
+        rotation=log_settings.LOG_ROTATION
+    )
+
+
+async def run(name: str, session_maker, args) -> None:
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def handler() -> None:
+        user_id = rng.randint(1, USERS)
+        async with semaphore:
+            started = time.perf_counter()
+            async with session_maker() as session:
+                user = await UserDAO(session).find_one_or_none_by_id(user_id)
+                logger.info(f'Пользователь {user.id} открыл бронирование')
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(args.handlers)))
+    elapsed = time.perf_counter() - started
+    drain_started = time.perf_counter()
+    await logger.complete()
+    logger.remove()
+    drain = time.perf_counter() - drain_started
+    print(f'{name:>20}: {args.handlers / elapsed:8.0f} handlers/s  '
+          f'{latency_summary(latencies)}  drain {drain * 1000:6.0f} ms',
+          file=sys.__stdout__)
+
+
+async def main(args) -> None:
+    engine = await create_engine(os.path.join(bench_dir, 'log_overhead.sqlite3'))
+    async with engine.begin() as connection:
+        await connection.execute(insert(User), [
+            {'id': user_id, 'first_name': f'user{user_id}'}
+            for user_id in range(1, USERS + 1)
+        ])
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    log_settings = settings.model_copy(update={'LOG_LEVEL': 'DEBUG'})
+    print(f'{args.handlers} handlers, concurrency {args.concurrency}, '
+          f'LOG_LEVEL DEBUG, LOG_RATE_LIMITS {settings.LOG_RATE_LIMITS}')
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        logger.remove()
+        await run('off', session_maker, args)
+        sync_sinks(log_settings, os.path.join(bench_dir, 'sync.log'))
+        await run('sync', session_maker, args)
+        setup_logging(log_settings, os.path.join(bench_dir, 'enqueued.log'))
+        await run('setup_logging', session_maker, args)
+        setup_logging(
+            log_settings.model_copy(update={'LOG_JSON': True}),
+            os.path.join(bench_dir, 'enqueued.json')
+        )
+        await run('setup_logging JSON', session_maker, args)
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--handlers', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,132 @@
+"""Напоминания: одна периодическая задача против задачи APScheduler на бронь.
+
+batched: --bookings броней на один день, и сутки запусков
+send_reminders_job раз в REMINDER_INTERVAL минут, каждый забирает
+claim_reminders порциями по REMINDER_CHUNK (публикация не меряется).
+per-job: --jobs задач 'date' в SQLAlchemyJobStore, как сделал бы
+планировщик с задачей на бронь, затем стоимость пробуждения планировщика:
+get_next_run_time и get_due_jobs на момент начала одного слота.
+
+    python -m app.benchmarks.reminders --bookings 100000 --jobs 10000
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import math
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from app.benchmarks import bench_dir, create_engine, latency_summary
+from app.config import settings
+from app.dao.dao import BookingDAO, TimeSlotUserDAO
+from app.dao.models import Booking, Table, TimeSlot, User
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+SLOTS = range(10, 22)
+DAY = date.today() + timedelta(days=1)
+
+
+def remind(booking_id: int) -> None:
+    """Задача на одну бронь в варианте per-job."""
+
+
+def slot_start(index: int) -> datetime:
+    return datetime.combine(DAY, datetime.min.time()) + timedelta(
+        hours=SLOTS[index % len(SLOTS)]
+    )
+
+
+async def batched(args) -> None:
+    engine = await create_engine(os.path.join(bench_dir, 'reminders.sqlite3'))
+    tables = math.ceil(args.bookings / len(SLOTS))
+    async with engine.begin() as connection:
+        await connection.execute(insert(User), [{'id': 1}])
+        await connection.execute(insert(TimeSlot), [
+            {'id': slot, 'start_time': f'{slot:02d}:00',
+             'end_time': f'{slot + 1:02d}:00'}
+            for slot in SLOTS
+        ])
+        await connection.execute(insert(Table), [
+            {'id': table_id, 'capacity': 4}
+            for table_id in range(1, tables + 1)
+        ])
+        for start in range(0, args.bookings, 50000):
+            await connection.execute(insert(Booking), [
+                {'user_id': 1, 'table_id': index // len(SLOTS) + 1,
+                 'time_slot_id': SLOTS[index % len(SLOTS)],
+                 'date': DAY, 'status': 'booked'}
+                for index in range(start, min(start + 50000, args.bookings))
+            ])
+    TimeSlotUserDAO.invalidate_cache()
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    lead = timedelta(minutes=settings.REMINDER_LEAD)
+    runs = []
+    claimed_total = 0
+    started = time.perf_counter()
+    now = datetime.combine(DAY, datetime.min.time())
+    while now.date() == DAY:
+        run_started = time.perf_counter()
+        async with session_maker() as session:
+            dao = BookingDAO(session)
+            while True:
+                claimed = await dao.claim_reminders(
+                    now, now + lead, settings.REMINDER_CHUNK
+                )
+                await session.commit()
+                claimed_total += len(claimed)
+                if len(claimed) < settings.REMINDER_CHUNK:
+                    break
+        runs.append(time.perf_counter() - run_started)
+        now += timedelta(minutes=settings.REMINDER_INTERVAL)
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    print(f'batched: {len(runs)} runs claimed {claimed_total} of '
+          f'{args.bookings} reminders in {elapsed:.2f}s')
+    print(f'  per run: {latency_summary(runs)}')
+
+
+async def per_job(args) -> None:
+    path = os.path.join(bench_dir, 'reminder_jobs.sqlite')
+    jobstore = SQLAlchemyJobStore(url=f'sqlite:///{path}')
+    scheduler = AsyncIOScheduler(jobstores={'default': jobstore})
+    scheduler.start(paused=True)
+    lead = timedelta(minutes=settings.REMINDER_LEAD)
+    started = time.perf_counter()
+    for index in range(args.jobs):
+        scheduler.add_job(
+            remind, 'date', args=[index], id=f'reminder_{index}',
+            run_date=slot_start(index) - lead
+        )
+    added = time.perf_counter() - started
+    print(f'per-job: added {args.jobs} jobs in {added:.2f}s '
+          f'({args.jobs / added:.0f} jobs/s, {args.bookings} would take '
+          f'{args.bookings * added / args.jobs:.0f}s), '
+          f'store {os.path.getsize(path) / 2 ** 20:.1f} MB')
+    wakeups = []
+    for _ in range(20):
+        wakeup_started = time.perf_counter()
+        jobstore.get_next_run_time()
+        wakeups.append(time.perf_counter() - wakeup_started)
+    print(f'  get_next_run_time: {latency_summary(wakeups)}')
+    due_started = time.perf_counter()
+    due = jobstore.get_due_jobs(slot_start(0) - lead)
+    print(f'  get_due_jobs for one slot: {len(due)} jobs in '
+          f'{(time.perf_counter() - due_started) * 1000:.1f} ms')
+    scheduler.shutdown(wait=False)
+
+
+async def main(args) -> None:
+    await batched(args)
+    await per_job(args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--jobs', type=int, default=10000)
+    asyncio.run(main(parser.parse_args()))
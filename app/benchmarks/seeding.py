@@ -0,0 +1,98 @@
+"""Сидирование столов и слотов: BaseDAO.add по строке против add_many/upsert_many.
+
+Строки те же, что init_db читает из TABLES_JSON и SLOTS_JSON. Каждый
+вариант пишет в свою SQLite, один commit в конце, печатаются rows/s и
+число выполненных SQL-запросов. upsert_many меряется дважды: первое
+сидирование пустой базы и повторное с измененными описаниями столов.
+
+    python -m app.benchmarks.seeding --tables 5000 --slots 288
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import os
+import time
+
+from app.benchmarks import bench_dir, create_engine
+from app.bot.booking.schemas import SSlot, STable
+from app.dao.dao import TableDAO, TimeSlotUserDAO
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+def venue(args, revision: int = 0) -> tuple[list[dict], list[dict]]:
+    tables = [
+        {'id': table_id, 'capacity': table_id % 8 + 1,
+         'description': f'Стол {table_id}, ревизия {revision}'}
+        for table_id in range(1, args.tables + 1)
+    ]
+    slots = [
+        {'id': slot_id,
+         'start_time': f'{slot_id * 5 // 60 % 24:02d}:{slot_id * 5 % 60:02d}',
+         'end_time': f'{(slot_id + 1) * 5 // 60 % 24:02d}:'
+                     f'{(slot_id + 1) * 5 % 60:02d}'}
+        for slot_id in range(args.slots)
+    ]
+    return tables, slots
+
+
+async def per_row(session: AsyncSession, tables, slots) -> None:
+    for values in tables:
+        await TableDAO(session).add(STable(**values))
+    for values in slots:
+        await TimeSlotUserDAO(session).add(SSlot(**values))
+
+
+async def add_many(session: AsyncSession, tables, slots) -> None:
+    await TableDAO(session).add_many(tables)
+    await TimeSlotUserDAO(session).add_many(slots)
+
+
+async def upsert_many(session: AsyncSession, tables, slots) -> None:
+    await TableDAO(session).upsert_many(tables)
+    await TimeSlotUserDAO(session).upsert_many(slots)
+
+
+async def run(name: str, engine, seed, tables, slots) -> None:
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, 'after_cursor_execute', count)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    rows = len(tables) + len(slots)
+    started = time.perf_counter()
+    async with session_maker() as session:
+        await seed(session, tables, slots)
+        await session.commit()
+    elapsed = time.perf_counter() - started
+    event.remove(engine.sync_engine, 'after_cursor_execute', count)
+    print(f'  {name:<22} {elapsed:7.3f}s  {rows / elapsed:10.0f} rows/s  '
+          f'{statements:6d} statements')
+
+
+async def main(args) -> None:
+    tables, slots = venue(args)
+    print(f'{args.tables} tables + {args.slots} slots:')
+    for name, seed in (
+        ('add per row', per_row),
+        ('add_many', add_many),
+        ('upsert_many', upsert_many),
+    ):
+        engine = await create_engine(
+            os.path.join(bench_dir, f'seeding_{seed.__name__}.sqlite3')
+        )
+        await run(name, engine, seed, tables, slots)
+        if seed is upsert_many:
+            await run('upsert_many re-seed', engine, seed, *venue(args, 1))
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', type=int, default=5000)
+    parser.add_argument('--slots', type=int, default=288)
+    asyncio.run(main(parser.parse_args()))
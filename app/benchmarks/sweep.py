@@ -0,0 +1,89 @@
+"""Время complete_past_bookings в зависимости от размера истории броней.
+
+Для каждого размера создается отдельная SQLite со схемой и индексами из
+моделей, около 80% броней лежит в прошлом. Печатается время сидирования,
+время прохода и число порций.
+
+    python -m app.benchmarks.sweep --sizes 10000 100000 1000000
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import date, timedelta
+
+from app.benchmarks import bench_dir, create_engine
+from app.dao.dao import BookingDAO, TimeSlotUserDAO
+from app.dao.models import Booking, Table, TimeSlot, User
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+TABLES = 100
+SLOTS = range(10, 22)
+PER_DAY = TABLES * len(SLOTS)
+
+
+def booking_rows(start: int, stop: int, first_day: date):
+    for index in range(start, stop):
+        yield {
+            'user_id': index % 1000 + 1,
+            'table_id': index % TABLES + 1,
+            'time_slot_id': SLOTS[index // TABLES % len(SLOTS)],
+            'date': first_day + timedelta(days=index // PER_DAY),
+            'status': 'canceled' if index % 10 == 0 else 'booked',
+        }
+
+
+async def seed(engine, size: int, batch: int = 50000) -> None:
+    first_day = date.today() - timedelta(days=int(size * 0.8) // PER_DAY)
+    async with engine.begin() as connection:
+        await connection.execute(insert(User), [
+            {'id': user_id} for user_id in range(1, 1001)
+        ])
+        await connection.execute(insert(Table), [
+            {'id': table_id, 'capacity': 4}
+            for table_id in range(1, TABLES + 1)
+        ])
+        await connection.execute(insert(TimeSlot), [
+            {'id': slot, 'start_time': f'{slot:02d}:00',
+             'end_time': f'{slot + 1:02d}:00'}
+            for slot in SLOTS
+        ])
+        for start in range(0, size, batch):
+            await connection.execute(
+                insert(Booking),
+                list(booking_rows(start, min(start + batch, size), first_day))
+            )
+
+
+async def run(size: int, chunk_size: int) -> None:
+    engine = await create_engine(os.path.join(bench_dir, f'sweep_{size}.sqlite3'))
+    started = time.perf_counter()
+    await seed(engine, size)
+    seeded = time.perf_counter() - started
+    TimeSlotUserDAO.invalidate_cache()
+    async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+        started = time.perf_counter()
+        chunks = await BookingDAO(session).complete_past_bookings(chunk_size)
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+    completed = sum(chunks)
+    print(f'{size:>9} bookings: seed {seeded:6.2f}s, sweep {elapsed:6.2f}s, '
+          f'completed {completed} in {len(chunks)} chunks, '
+          f'{completed / elapsed:,.0f} rows/s')
+
+
+async def main(args) -> None:
+    for size in args.sizes:
+        await run(size, args.chunk_size)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10000, 100000, 1000000]
+    )
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
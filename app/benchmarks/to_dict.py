@@ -0,0 +1,104 @@
+"""Микробенчмарк сериализации строк: to_dict/to_dicts против прежнего to_dict.
+
+Строки Table и Booking загружаются из SQLite, так что у них заполнены
+created_at/updated_at и работают конвертеры. Прежняя реализация
+воспроизведена в legacy_to_dict: inspect() и isinstance на каждую строку.
+
+    python -m app.benchmarks.to_dict --rows 10000
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import os
+import timeit
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.benchmarks import bench_dir, create_engine
+from app.dao.models import Booking, Table, TimeSlot, User
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+def legacy_to_dict(row, exclude_none: bool = False) -> dict:
+    result = {}
+    for column in inspect(row.__class__).columns:
+        value = getattr(row, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+
+        if not exclude_none or value is not None:
+            result[column.key] = value
+    return result
+
+
+async def load_rows(count: int) -> tuple[list[Table], list[Booking]]:
+    engine = await create_engine(os.path.join(bench_dir, 'to_dict.sqlite3'))
+    async with engine.begin() as connection:
+        await connection.execute(insert(User), [{'id': 1}])
+        await connection.execute(insert(TimeSlot), [
+            {'id': 10, 'start_time': '10:00', 'end_time': '11:00'}
+        ])
+        await connection.execute(insert(Table), [
+            {'id': table_id, 'capacity': 4, 'description': f'Стол {table_id}'}
+            for table_id in range(1, count + 1)
+        ])
+        await connection.execute(insert(Booking), [
+            {'user_id': 1, 'table_id': table_id, 'time_slot_id': 10,
+             'date': date.today() + timedelta(days=table_id % 30),
+             'status': 'booked'}
+            for table_id in range(1, count + 1)
+        ])
+    async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+        tables = list((await session.execute(select(Table))).scalars())
+        bookings = list((await session.execute(select(Booking))).scalars())
+    await engine.dispose()
+    return tables, bookings
+
+
+def bench(name: str, func, rows: int, repeat: int) -> float:
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f'  {name:<28} {best * 1e6 / rows:6.2f} us/row')
+    return best
+
+
+def main(args) -> None:
+    tables, bookings = asyncio.run(load_rows(args.rows))
+    for model, rows in ((Table, tables), (Booking, bookings)):
+        assert model.to_dicts(rows) == [legacy_to_dict(row) for row in rows]
+        print(f'{model.__name__}, {len(rows)} rows:')
+        legacy = bench(
+            'legacy to_dict',
+            lambda: [legacy_to_dict(row) for row in rows],
+            len(rows), args.repeat
+        )
+        single = bench(
+            'to_dict',
+            lambda: [row.to_dict() for row in rows],
+            len(rows), args.repeat
+        )
+        bulk = bench(
+            'to_dicts',
+            lambda: model.to_dicts(rows),
+            len(rows), args.repeat
+        )
+        bench(
+            'to_dicts(include={id})',
+            lambda: model.to_dicts(rows, include={'id'}),
+            len(rows), args.repeat
+        )
+        print(f'  speedup: to_dict x{legacy / single:.1f}, '
+              f'to_dicts x{legacy / bulk:.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args())
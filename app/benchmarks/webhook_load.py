@@ -0,0 +1,136 @@
+"""Генератор нагрузки на webhook: POST синтетических апдейтов по HTTP.
+
+Шлет --updates апдейтов с командой /book от --chats разных чатов с
+--concurrency запросами одновременно и печатает updates/s, p50/p95/p99
+времени ответа webhook и коды ответов. Заголовок секрета берется из
+--secret или WEBHOOK_SECRET, он должен совпадать с секретом сервера.
+
+С --serve поднимает app.api.webhook локально: бот с фейковой сессией
+Bot API, TestRabbitBroker и только сценарий бронирования, как в
+app.loadtest. Тогда печатается и время, за которое UpdateQueue
+обработала все принятые апдейты.
+
+    python -m app.benchmarks.webhook_load --serve --updates 5000
+    python -m app.benchmarks.webhook_load --url http://host:8000/webhook
+"""
+import app.benchmarks  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from collections import Counter
+
+import aiohttp
+from app.benchmarks import latency_summary
+from app.config import settings
+
+
+def make_update(update_id: int, chat_id: int) -> bytes:
+    return json.dumps({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f'user{chat_id}'},
+            'text': '/book',
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': 5}],
+        },
+    }).encode()
+
+
+async def post_updates(args) -> int:
+    rng = random.Random(args.seed)
+    update_ids = itertools.count(1)
+    remaining = iter(range(args.updates))
+    latencies = []
+    statuses = Counter()
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Telegram-Bot-Api-Secret-Token': args.secret,
+    }
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=args.concurrency)
+    ) as http:
+        async def sender() -> None:
+            for _ in remaining:
+                body = make_update(next(update_ids), rng.randint(1, args.chats))
+                started = time.perf_counter()
+                try:
+                    async with http.post(args.url, data=body, headers=headers) as response:
+                        await response.read()
+                        statuses[response.status] += 1
+                except aiohttp.ClientError as e:
+                    statuses[type(e).__name__] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sender() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    print(f'{args.updates} updates from {args.chats} chats, '
+          f'concurrency {args.concurrency}: {args.updates / elapsed:.1f} updates/s')
+    print(f'webhook response: {latency_summary(latencies)}')
+    print(f'statuses: {dict(statuses)}')
+    return statuses[200]
+
+
+async def serve_and_post(args) -> None:
+    # app.loadtest подменяет отсутствующий app.bot.user.kbs, поэтому первым.
+    from app.loadtest import FakeSession, router  # isort: skip
+    import uvicorn
+    from app.api.webhook import app as webhook_app
+    from app.api.webhook import update_queue
+    from app.bot.booking.dialog import booking_dialog
+    from app.bot.create_bot import bot, dp, start_bot
+    from app.config import get_broker
+    from app.dao.database import Base, engine
+    from faststream.rabbit import TestRabbitBroker
+
+    bot.session = FakeSession()
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    broker = get_broker()
+    logging.getLogger('faststream.access.rabbit').setLevel(logging.WARNING)
+    async with TestRabbitBroker(broker):
+        await start_bot(routers=[booking_dialog, router])
+        server = uvicorn.Server(uvicorn.Config(
+            webhook_app, host='127.0.0.1', port=args.port,
+            lifespan='off', log_level='warning'
+        ))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        accepted = await post_updates(args)
+        await update_queue.stop()
+        elapsed = time.perf_counter() - started
+        print(f'processed {update_queue.processed} of {accepted} accepted '
+              f'updates in {elapsed:.2f}s: '
+              f'{update_queue.processed / elapsed:.1f} updates/s, '
+              f'max partition depth {update_queue.max_depth}')
+        server.should_exit = True
+        await serving
+        await dp.storage.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--secret', default=settings.WEBHOOK_SECRET)
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--chats', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--serve', action='store_true',
+        help='поднять webhook-приложение локально с фейковым Bot API'
+    )
+    parser.add_argument('--port', type=int, default=settings.WEBHOOK_PORT)
+    args = parser.parse_args()
+    args.url = args.url or f'http://127.0.0.1:{args.port}/webhook'
+    asyncio.run(serve_and_post(args) if args.serve else post_updates(args))
@@ -3,9 +3,13 @@ from datetime import date
 from aiogram.types import CallbackQuery
 from aiogram_dialog import DialogManager
 from aiogram_dialog.widgets.kbd import Button
-from app.bot.booking.schemas import SCapacity, SNevBooking
+from app.bot.booking.schemas import SCapacity, SSlot, STable
+from app.bot.booking.state import BookingState
+from app.bot.notifications import notify
 from app.bot.user.kbs import main_user_kb
+from app.config import settings
 from app.dao.dao import BookingDAO, TableDAO, TimeSlotUserDAO
+from loguru import logger
 
 
 async def cancel_logic(
@@ -29,11 +33,12 @@ async def process_add_count_capacity(
     session = dialog_manager.middleware_data.get("session_without_commit")
     selected_capacity = int(button.widget_id)
     dialog_manager.dialog_data["capacity"] = selected_capacity
-    dialog_manager.dialog_data['tables'] = (
-        await TableDAO(session).find_all(
-            SCapacity(capacity=selected_capacity)
-        )
+    tables = await TableDAO(session).find_all(
+        SCapacity(capacity=selected_capacity)
     )
+    dialog_manager.dialog_data['tables'] = [
+        STable.model_validate(table).model_dump() for table in tables
+    ]
     await callback.answer(f"Выбрано {selected_capacity} гостей")
     await dialog_manager.next()
 
@@ -48,7 +53,9 @@ async def on_table_selected(
     session = dialog_manager.middleware_data.get("session_without_commit")
     table_id = int(item_id)
     selected_table = await TableDAO(session).find_one_or_none_by_id(table_id)
-    dialog_manager.dialog_data["selected_table"] = selected_table
+    dialog_manager.dialog_data["selected_table"] = (
+        STable.model_validate(selected_table).model_dump()
+    )
     await callback.answer(
         f"Выбран стол №{table_id} на {selected_table.capacity} мест"
     )
@@ -62,24 +69,82 @@ async def process_date_selected(
     selected_date: date
 ):
     """Обработчик выбора даты."""
-    dialog_manager.dialog_data["booking_date"] = selected_date
+    dialog_manager.dialog_data["booking_date"] = selected_date.isoformat()
     session = dialog_manager.middleware_data.get("session_without_commit")
     selected_table = dialog_manager.dialog_data["selected_table"]
     slots = await BookingDAO(session).get_available_time_slots(
-        table_id=selected_table.id,
+        table_id=selected_table['id'],
         booking_date=selected_date
     )
     if slots:
         await callback.answer(f"Выбрана дата: {selected_date}")
-        dialog_manager.dialog_data["slots"] = slots
+        dialog_manager.dialog_data["slots"] = [
+            SSlot.model_validate(slot).model_dump() for slot in slots
+        ]
         await dialog_manager.next()
     else:
         await callback.answer(
-            f"Нет мест на {selected_date} для стола №{selected_table.id}!"
+            f"Нет мест на {selected_date} для стола №{selected_table['id']}!"
         )
         await dialog_manager.back()
 
 
+async def on_search_date_selected(
+    callback: CallbackQuery,
+    widget,
+    dialog_manager: DialogManager,
+    selected_date: date
+):
+    """Обработчик выбора даты при подборе любого подходящего стола."""
+    session = dialog_manager.middleware_data.get("session_without_commit")
+    capacity = dialog_manager.dialog_data["capacity"]
+    found = await BookingDAO(session).search_tables(
+        party_size=capacity,
+        booking_date=selected_date
+    )
+    if not found:
+        await callback.answer(f"Нет свободных столов на {selected_date}!")
+        return
+    dialog_manager.dialog_data["booking_date"] = selected_date.isoformat()
+    dialog_manager.dialog_data["found_tables"] = [
+        {**STable.model_validate(table).model_dump(), "free_slots": free_slots}
+        for table, free_slots in found
+    ]
+    await callback.answer(f"Выбрана дата: {selected_date}")
+    await dialog_manager.switch_to(BookingState.search_table)
+
+
+async def on_search_table_selected(
+    callback: CallbackQuery,
+    widget,
+    dialog_manager: DialogManager,
+    item_id: str
+):
+    """Обработчик выбора стола из найденных на дату."""
+    session = dialog_manager.middleware_data.get("session_without_commit")
+    table_id = int(item_id)
+    selected_table = next(
+        table for table in dialog_manager.dialog_data["found_tables"]
+        if table["id"] == table_id
+    )
+    booking_date = date.fromisoformat(dialog_manager.dialog_data["booking_date"])
+    slots = await BookingDAO(session).get_available_time_slots(
+        table_id=table_id,
+        booking_date=booking_date
+    )
+    if not slots:
+        await callback.answer(f"Стол №{table_id} уже занят на {booking_date}!")
+        return
+    dialog_manager.dialog_data["selected_table"] = {
+        key: selected_table[key] for key in STable.model_fields
+    }
+    dialog_manager.dialog_data["slots"] = [
+        SSlot.model_validate(slot).model_dump() for slot in slots
+    ]
+    await callback.answer(f"Выбран стол №{table_id}")
+    await dialog_manager.switch_to(BookingState.booking_time)
+
+
 async def process_slots_selected(
     callback: CallbackQuery,
     widget,
@@ -96,7 +161,9 @@ async def process_slots_selected(
         f"Выбрано время с {selected_slot.start_time} до "
         f"{selected_slot.end_time}"
     )
-    dialog_manager.dialog_data['selected_slot'] = selected_slot
+    dialog_manager.dialog_data['selected_slot'] = (
+        SSlot.model_validate(selected_slot).model_dump()
+    )
     await dialog_manager.next()
 
 
@@ -107,22 +174,30 @@ async def on_confirmation(callback: CallbackQuery, widget, dialog_manager: Dialo
     # Получаем выбранные данные
     selected_table = dialog_manager.dialog_data['selected_table']
     selected_slot = dialog_manager.dialog_data['selected_slot']
-    booking_date = dialog_manager.dialog_data['booking_date']
+    booking_date = date.fromisoformat(
+        dialog_manager.dialog_data['booking_date']
+    )
     user_id = callback.from_user.id
-    check = await BookingDAO(session).check_available_bookings(table_id=selected_table.id,
-                                                              time_slot_id=selected_slot.id,
-                                                              booking_date=booking_date)
-    if check:
-        await callback.answer("Приступаю к сохранению")
-        add_model = SNevBooking(user_id=user_id, table_id=selected_table.id,
-                               time_slot_id=selected_slot.id, date=booking_date, status="booked")
-        await BookingDAO(session).add(add_model)
+    reservation = await BookingDAO(session).reserve_slot(
+        user_id=user_id,
+        table_id=selected_table['id'],
+        booking_date=booking_date,
+        time_slot_id=selected_slot['id']
+    )
+    if not reservation.conflict:
+        # Бронь фиксируется до ответа пользователю и до публикации
+        # уведомления: ни то, ни другое уже не может ее откатить.
+        await session.commit()
         await callback.answer(f"Бронирование успешно создано!")
         text = "Бронь успешно сохранена🔢🍴 Со списком своих броней можно ознакомиться в меню 'МОИ БРОНИ'"
         await callback.message.answer(text, reply_markup=main_user_kb(user_id))
 
-        admin_text = (f"Внимание! Пользователь с ID {callback.from_user.id} забронировал столик №{selected_table.id} "
-                     f"на {booking_date}. Время брони с {selected_slot.start_time} до {selected_slot.end_time}")
+        admin_text = (f"Внимание! Пользователь с ID {callback.from_user.id} забронировал столик №{selected_table['id']} "
+                     f"на {booking_date}. Время брони с {selected_slot['start_time']} до {selected_slot['end_time']}")
+        try:
+            await notify('new_booking', settings.ADMIN_IDS, admin_text)
+        except Exception as e:
+            logger.error(f'Error publishing new booking notification: {e}')
         await dialog_manager.done()
     else:
         await callback.answer("Места на этот слот уже заняты!")
@@ -1,6 +1,6 @@
 from datetime import date
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class SCapacity(BaseModel):
@@ -13,3 +13,19 @@ class SNewBooking(BaseModel):
     time_slot_id: int
     date: date
     status: str
+
+
+class STable(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    capacity: int
+    description: str | None
+
+
+class SSlot(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    start_time: str
+    end_time: str
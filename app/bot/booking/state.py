@@ -8,3 +8,5 @@ class BookingState(StatesGroup):
     booking_time = State()
     confirmation = State()
     success = State()
+    search_date = State()
+    search_table = State()
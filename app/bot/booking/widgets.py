@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from aiogram_dialog import DialogManager
+from aiogram_dialog.widgets.kbd import Calendar
+from aiogram_dialog.widgets.kbd.calendar_kbd import (DATE_TEXT, TODAY_TEXT,
+                                                     CalendarDaysView,
+                                                     CalendarScope,
+                                                     CalendarScopeView,
+                                                     get_today, month_begin,
+                                                     next_month_begin)
+from aiogram_dialog.widgets.text import Case, Format
+from app.dao.dao import BookingDAO
+
+FULL_DATE_TEXT = Format("✖️")
+
+
+def is_full_date(data: dict, case: Case, manager: DialogManager) -> bool:
+    return data["date"] in data["data"].get("full_dates", ())
+
+
+class AvailabilityCalendar(Calendar):
+    """Календарь, помечающий дни без свободных слотов у выбранного стола."""
+
+    def _init_views(self) -> dict[CalendarScope, CalendarScopeView]:
+        views = super()._init_views()
+        views[CalendarScope.DAYS] = CalendarDaysView(
+            self._item_callback_data,
+            date_text=Case(
+                {True: FULL_DATE_TEXT, False: DATE_TEXT},
+                selector=is_full_date
+            ),
+            today_text=Case(
+                {True: FULL_DATE_TEXT, False: TODAY_TEXT},
+                selector=is_full_date
+            )
+        )
+        return views
+
+    async def _render_keyboard(self, data, manager: DialogManager):
+        if self.get_scope(manager) == CalendarScope.DAYS:
+            offset = self.get_offset(manager) or get_today(self.config.timezone)
+            session = manager.middleware_data.get("session_without_commit")
+            table_id = manager.dialog_data["selected_table"]["id"]
+            free_counts = await BookingDAO(session).get_free_slot_counts(
+                table_id=table_id,
+                start_date=month_begin(offset),
+                end_date=next_month_begin(offset) - timedelta(days=1)
+            )
+            data = {
+                **data,
+                "full_dates": {
+                    day for day, count in free_counts.items() if count <= 0
+                }
+            }
+        return await super()._render_keyboard(data, manager)
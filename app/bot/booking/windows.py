@@ -2,16 +2,20 @@ from datetime import date, timedelta, timezone
 
 from aiogram_dialog import Window
 from aiogram_dialog.widgets.kbd import (Back, Button, Calendar, CalendarConfig,
-                                        Cancel, Group, ScrollingGroup, Select)
+                                        Cancel, Group, ScrollingGroup, Select,
+                                        SwitchTo)
 from aiogram_dialog.widgets.text import Const, Format
 from app.bot.booking.getters import (get_all_available_slots, get_all_tables,
-                                     get_confirmed_data)
+                                     get_confirmed_data, get_found_tables)
 from app.bot.booking.handlers import (cancel_logic, on_confirmation,
+                                      on_search_date_selected,
+                                      on_search_table_selected,
                                       on_table_selected,
                                       process_add_count_capacity,
                                       process_date_selected,
                                       process_slots_selected)
 from app.bot.booking.state import BookingState
+from app.bot.booking.widgets import AvailabilityCalendar
 
 
 def get_capacity_window() -> Window:
@@ -47,6 +51,11 @@ def get_table_window() -> Window:
             width=1,
             height=1,
         ),
+        SwitchTo(
+            Const("🔎 Любой свободный стол на дату"),
+            id="search_tables",
+            state=BookingState.search_date
+        ),
         Group(
             Back(Const("Назад")),
             Cancel(Const("Отмена"), on_click=cancel_logic),
@@ -60,8 +69,8 @@ def get_table_window() -> Window:
 def get_date_window() -> Window:
     """Окно выбора даты."""
     return Window(
-        Const("На какой день бронируем столик?"),
-        Calendar(
+        Const("На какой день бронируем столик? ✖️ - свободных мест нет."),
+        AvailabilityCalendar(
             id="cal",
             on_click=process_date_selected,
             config=CalendarConfig(
@@ -109,4 +118,50 @@ def get_confirmed_windows():
         ),
         state=BookingState.confirmation,
         getter=get_confirmed_data
-    )
\ No newline at end of file
+    )
+
+def get_search_date_window() -> Window:
+    """Окно выбора даты для подбора стола."""
+    return Window(
+        Const("На какой день подобрать столик?"),
+        Calendar(
+            id="search_cal",
+            on_click=on_search_date_selected,
+            config=CalendarConfig(
+                firstweekday=0,
+                timezone=timezone(timedelta(hours=3)),
+                min_date=date.today()
+            )
+        ),
+        SwitchTo(Const("Назад"), id="search_date_back", state=BookingState.table),
+        Cancel(Const("Отмена"), on_click=cancel_logic),
+        state=BookingState.search_date,
+    )
+
+
+def get_search_table_window() -> Window:
+    """Окно выбора стола из подобранных на дату."""
+    return Window(
+        Format("{text_found}"),
+        ScrollingGroup(
+            Select(
+                Format("Стол №{item[id]} на {item[capacity]} мест - "
+                       "свободно слотов: {item[free_slots]}"),
+                id="found_table_select",
+                item_id_getter=lambda item: str(item["id"]),
+                items="found_tables",
+                on_click=on_search_table_selected,
+            ),
+            id="found_tables_scrolling",
+            width=1,
+            height=5,
+        ),
+        SwitchTo(
+            Const("Назад"),
+            id="search_table_back",
+            state=BookingState.search_date
+        ),
+        Cancel(Const("Отмена"), on_click=cancel_logic),
+        getter=get_found_tables,
+        state=BookingState.search_table,
+    )
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable
+
+from aiogram import Bot
+from app.bot.rate_limit import TelegramRateLimiter, send_with_retries
+from app.config import settings
+from app.dao.dao import UserDAO
+from app.dao.database import async_session_maker
+from loguru import logger
+
+
+@dataclass(slots=True)
+class BroadcastStats:
+    """Итоги рассылки."""
+    total: int = 0
+    sent: int = 0
+    blocked: int = 0
+    failed: int = 0
+    retries: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class Broadcaster:
+    """Рассылка одного текста всем пользователям или списку чатов.
+
+    Получатели читаются из users порциями, пока concurrency отправщиков
+    разбирают уже прочитанные id, так что в памяти не больше пары порций.
+    Все отправки проходят через общий с уведомлениями TelegramRateLimiter.
+    На RetryAfter общий лимит ставится на паузу, сетевые ошибки
+    повторяются с экспоненциальной задержкой, заблокировавшие бота
+    пользователи считаются отдельно.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        limiter: TelegramRateLimiter,
+        concurrency: int = 30,
+        chunk_size: int = 1000,
+        retries: int = 3,
+        backoff: float = 1
+    ):
+        self.bot = bot
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff = backoff
+        self.last_stats: BroadcastStats | None = None
+
+    async def run(
+        self,
+        text: str,
+        chat_ids: Iterable[int] | None = None
+    ) -> BroadcastStats:
+        """Рассылает text по chat_ids, а без них - всем пользователям."""
+        stats = self.last_stats = BroadcastStats()
+        queue: asyncio.Queue[int | None] = asyncio.Queue(
+            maxsize=max(self.chunk_size, self.concurrency)
+        )
+        workers = [
+            asyncio.create_task(self._worker(queue, text, stats))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            async for chunk in self._recipients(chat_ids):
+                for chat_id in chunk:
+                    stats.total += 1
+                    await queue.put(chat_id)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            stats.finished_at = time.monotonic()
+        logger.info(
+            f'Broadcast finished in {stats.elapsed:.1f}s: '
+            f'{stats.sent}/{stats.total} sent, {stats.blocked} blocked, '
+            f'{stats.failed} failed, {stats.retries} retries'
+        )
+        return stats
+
+    async def _recipients(
+        self,
+        chat_ids: Iterable[int] | None
+    ) -> AsyncIterator[list[int]]:
+        if chat_ids is not None:
+            yield list(chat_ids)
+            return
+        # Сессия на порцию: рассылка идет минутами, и соединение не
+        # должно держать транзакцию чтения все это время.
+        last_id = None
+        while True:
+            async with async_session_maker() as session:
+                user_ids = await UserDAO(session).get_id_chunk(
+                    self.chunk_size, after=last_id
+                )
+            if user_ids:
+                yield user_ids
+            if len(user_ids) < self.chunk_size:
+                return
+            last_id = user_ids[-1]
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        text: str,
+        stats: BroadcastStats
+    ) -> None:
+        while (chat_id := await queue.get()) is not None:
+            await self._send(chat_id, text, stats)
+
+    async def _send(self, chat_id: int, text: str, stats: BroadcastStats) -> None:
+        delivery = await send_with_retries(
+            self.limiter,
+            chat_id,
+            lambda: self.bot.send_message(chat_id, text),
+            retries=self.retries,
+            backoff=self.backoff
+        )
+        stats.retries += delivery.retries
+        if delivery.status == 'sent':
+            stats.sent += 1
+        elif delivery.status == 'blocked':
+            stats.blocked += 1
+        else:
+            stats.failed += 1
+
+
+def create_broadcaster(bot: Bot, limiter: TelegramRateLimiter) -> Broadcaster:
+    return Broadcaster(
+        bot,
+        limiter,
+        concurrency=settings.BROADCAST_CONCURRENCY,
+        chunk_size=settings.BROADCAST_CHUNK
+    )
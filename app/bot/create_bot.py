@@ -1,16 +1,21 @@
 import locale
-from aiogram import Bot, Dispatcher
+from aiogram import Bot, Dispatcher, Router
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand, BotCommandScopeDefault
 from aiogram_dialog import setup_dialogs
 from loguru import logger
-from app.bot.booking.dialog import booking_dialog
-from app.bot.user.router import router as user_router
-from app.bot.admin.router import router as admin_router
-from app.config import settings
-from app.dao.database_middleware import DatabaseMiddlewareWithoutCommit, DatabaseMiddlewareWithCommit
+from app.bot.broadcast import create_broadcaster
+from app.bot.notifications import (create_notification_sender, notify,
+                                   setup_notifications)
+from app.config import get_broker, settings, setup_logger
+from app.dao.availability import availability_index
+from app.dao.database import async_session_maker, engine
+from app.dao.fsm_storage import FSMFlushMiddleware, SQLAlchemyStorage
+from app.dao.stats import booking_stats
+from app.metrics import HandlerTimingMiddleware, TelegramTimingMiddleware
+from app.dao.database_middleware import DatabaseMiddleware
 from app.dao.init_logic import init_db
 
 
@@ -18,7 +23,21 @@ bot = Bot(
     token=settings.BOT_TOKEN,
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
-dp = Dispatcher(storage=MemoryStorage())
+if settings.FSM_STORAGE == 'sql':
+    storage = SQLAlchemyStorage(
+        engine,
+        ttl=settings.FSM_TTL,
+        flush_interval=settings.FSM_FLUSH_INTERVAL,
+        cache_size=settings.FSM_CACHE_SIZE
+    )
+else:
+    storage = MemoryStorage()
+bot.session.middleware(TelegramTimingMiddleware())
+dp = Dispatcher(storage=storage)
+database_middleware = DatabaseMiddleware()
+notification_sender = create_notification_sender(bot)
+# Рассылки делят с уведомлениями общий лимит Telegram на бота.
+broadcaster = create_broadcaster(bot, notification_sender.limiter)
 
 async def set_commands():
     commands = [BotCommand(command='start', description='Старт')]
@@ -36,21 +55,36 @@ def set_russian_locale():
             # Игнорируем ошибку, если локаль не поддерживается
             pass
 
-async def start_bot():
+def get_routers() -> list[Router]:
+    # Роутеры импортируются здесь, чтобы импорт create_bot оставался
+    # дешевым для утилит, которым нужны только bot и dp.
+    from app.bot.admin.router import router as admin_router
+    from app.bot.booking.dialog import booking_dialog
+    from app.bot.user.router import router as user_router
+    return [booking_dialog, user_router, admin_router]
+
+async def start_bot(routers: list[Router] | None = None):
+    setup_logger()
     set_russian_locale()
     if settings.INIT_DB:
         await init_db()
+    if settings.WORKERS == 1:
+        # Индексы в памяти не видят изменений из других процессов.
+        async with async_session_maker() as session:
+            await availability_index.warm(session)
+            await booking_stats.warm(session)
+    if isinstance(storage, SQLAlchemyStorage):
+        # Устаревшие состояния чистит clear_expired_fsm_job лидера.
+        # Внешний middleware: запись FSM идет после коммита сессии апдейта.
+        dp.update.outer_middleware(FSMFlushMiddleware(storage))
     setup_dialogs(dp)
-    dp.update.middleware.register(DatabaseMiddlewareWithoutCommit())
-    dp.update.middleware.register(DatabaseMiddlewareWithCommit())
+    dp.update.middleware.register(database_middleware)
+    dp.message.middleware(HandlerTimingMiddleware())
+    dp.callback_query.middleware(HandlerTimingMiddleware())
     await set_commands()
-    dp.include_router(booking_dialog)
-    dp.include_router(user_router)
-    dp.include_router(admin_router)
+    dp.include_routers(*(get_routers() if routers is None else routers))
 
-    for admin_id in settings.ADMIN_IDS:
-        try:
-            await bot.send_message(admin_id, f'Я запущен🥳.')
-        except:
-            pass
+    setup_notifications(notification_sender)
+    await get_broker().start()
+    await notify('startup', settings.ADMIN_IDS, 'Я запущен🥳.')
     logger.info("Бот успешно запущен.")
\ No newline at end of file
@@ -0,0 +1,192 @@
+import asyncio
+from collections import defaultdict, deque
+
+from aiogram import Bot
+from app.bot.rate_limit import TelegramRateLimiter, send_with_retries
+from app.config import get_broker, settings
+from loguru import logger
+from pydantic import BaseModel
+
+NOTIFICATIONS_QUEUE = 'notifications'
+NOTIFICATIONS_BATCH_QUEUE = 'notifications.batch'
+MESSAGE_LIMIT = 4096
+
+
+class SNotification(BaseModel):
+    kind: str
+    chat_ids: list[int]
+    text: str
+
+
+class SNotificationItem(BaseModel):
+    chat_id: int
+    text: str
+
+
+class SNotificationBatch(BaseModel):
+    kind: str
+    items: list[SNotificationItem]
+
+
+async def notify(kind: str, chat_ids: list[int], text: str) -> None:
+    """Публикует уведомление в очередь, отправка идет в консьюмере."""
+    await get_broker().publish(
+        SNotification(kind=kind, chat_ids=chat_ids, text=text),
+        queue=NOTIFICATIONS_QUEUE
+    )
+
+
+async def notify_batch(kind: str, items: list[tuple[int, str]]) -> None:
+    """Публикует пачку персональных уведомлений одним сообщением."""
+    await get_broker().publish(
+        SNotificationBatch(
+            kind=kind,
+            items=[
+                SNotificationItem(chat_id=chat_id, text=text)
+                for chat_id, text in items
+            ]
+        ),
+        queue=NOTIFICATIONS_BATCH_QUEUE
+    )
+
+
+class NotificationError(Exception):
+    """Часть текстов сообщения из очереди не удалось отправить."""
+
+
+class NotificationSender:
+    """Отправляет уведомления из очереди с учетом лимитов Telegram.
+
+    Сообщение из очереди подтверждается только после отправки всех его
+    текстов, поэтому при перезапуске неотправленное будет доставлено
+    брокером повторно. Если отправка не удалась и после повторов, handle
+    падает с NotificationError, и сообщение не подтверждается. Тексты
+    заблокировавшим бота пользователям не повторяются. Тексты для одного
+    чата, накопившиеся пока чат ждет своего окна отправки, склеиваются в
+    одно сообщение.
+    """
+
+    def __init__(self, bot: Bot, limiter: TelegramRateLimiter):
+        self.bot = bot
+        self.limiter = limiter
+        self._buffers: dict[int, deque[tuple[str, asyncio.Future]]] = (
+            defaultdict(deque)
+        )
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.sent = 0
+        self.blocked = 0
+        self.failed = 0
+
+    async def handle(self, message: SNotification) -> None:
+        self._check(message.kind, await asyncio.gather(*(
+            self.enqueue(chat_id, message.text)
+            for chat_id in message.chat_ids
+        )))
+
+    async def handle_batch(self, message: SNotificationBatch) -> None:
+        self._check(message.kind, await asyncio.gather(*(
+            self.enqueue(item.chat_id, item.text)
+            for item in message.items
+        )))
+
+    @staticmethod
+    def _check(kind: str, statuses: list[str]) -> None:
+        failed = statuses.count('failed')
+        if failed:
+            raise NotificationError(
+                f'{failed} of {len(statuses)} {kind} notifications failed'
+            )
+
+    def enqueue(self, chat_id: int, text: str) -> asyncio.Future:
+        """Ставит text в очередь чата; future получит статус отправки."""
+        done = asyncio.get_running_loop().create_future()
+        self._buffers[chat_id].append((text, done))
+        if chat_id not in self._tasks:
+            self._tasks[chat_id] = asyncio.create_task(
+                self._flush_chat(chat_id)
+            )
+        return done
+
+    async def join(self) -> None:
+        """Дожидается отправки всех накопленных уведомлений."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _flush_chat(self, chat_id: int) -> None:
+        buffer = self._buffers[chat_id]
+        items: list[tuple[str, asyncio.Future]] = []
+        try:
+            while buffer:
+                # Тексты разбираются после окна чата: пришедшие за время
+                # ожидания уходят тем же сообщением. Повторы send_with_retries
+                # ждут limiter сами.
+                await self.limiter.acquire(chat_id)
+                items = [buffer.popleft()]
+                while buffer and (
+                    sum(len(text) + 2 for text, _ in items) + len(buffer[0][0])
+                    <= MESSAGE_LIMIT
+                ):
+                    items.append(buffer.popleft())
+                status = await self.send(
+                    chat_id,
+                    '\n\n'.join(text for text, _ in items),
+                    acquired=True
+                )
+                for _, done in items:
+                    if not done.done():
+                        done.set_result(status)
+                items = []
+        except asyncio.CancelledError:
+            # Сообщения с неотправленными текстами остаются
+            # неподтвержденными, брокер доставит их повторно.
+            for _, done in [*items, *buffer]:
+                done.cancel()
+            raise
+        except Exception as e:
+            logger.exception(f'Error flushing notifications for {chat_id}: {e}')
+            for _, done in [*items, *buffer]:
+                if not done.done():
+                    done.set_exception(e)
+        finally:
+            del self._buffers[chat_id]
+            del self._tasks[chat_id]
+
+    async def send(
+        self,
+        chat_id: int,
+        text: str,
+        retries: int = 3,
+        acquired: bool = False
+    ) -> str:
+        """Отправляет text, возвращает статус: sent, blocked или failed."""
+        delivery = await send_with_retries(
+            self.limiter,
+            chat_id,
+            lambda: self.bot.send_message(chat_id, text),
+            retries=retries,
+            acquired=acquired
+        )
+        if delivery.status == 'sent':
+            self.sent += 1
+        elif delivery.status == 'blocked':
+            self.blocked += 1
+        else:
+            self.failed += 1
+        return delivery.status
+
+
+def create_notification_sender(bot: Bot) -> NotificationSender:
+    return NotificationSender(
+        bot,
+        TelegramRateLimiter(
+            global_rate=settings.TELEGRAM_GLOBAL_RATE,
+            per_chat_interval=settings.TELEGRAM_CHAT_INTERVAL
+        )
+    )
+
+
+def setup_notifications(sender: NotificationSender) -> None:
+    """Регистрирует консьюмер очереди уведомлений на брокере."""
+    broker = get_broker()
+    broker.subscriber(NOTIFICATIONS_QUEUE)(sender.handle)
+    broker.subscriber(NOTIFICATIONS_BATCH_QUEUE)(sender.handle_batch)
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from aiogram.exceptions import (TelegramAPIError, TelegramForbiddenError,
+                                TelegramNetworkError, TelegramRetryAfter)
+from loguru import logger
+
+
+class TokenBucket:
+    """Token bucket: не больше rate операций в секунду, всплеск до capacity."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Забирает токены на seconds вперед, например после RetryAfter."""
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class TelegramRateLimiter:
+    """Ограничения Telegram: общий лимит на бота и интервал на чат."""
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        per_chat_interval: float = 1
+    ):
+        # Без запаса токенов: полный бакет на global_rate дал бы всплеск,
+        # и в одну секунду попадало бы до 2 * global_rate сообщений.
+        self.bucket = TokenBucket(global_rate, capacity=1)
+        self.per_chat_interval = per_chat_interval
+        self._chat_next: dict[int, float] = {}
+
+    async def acquire(self, chat_id: int) -> None:
+        now = time.monotonic()
+        next_allowed = self._chat_next.get(chat_id, now)
+        self._chat_next[chat_id] = max(now, next_allowed) + self.per_chat_interval
+        if next_allowed > now:
+            await asyncio.sleep(next_allowed - now)
+        await self.bucket.acquire()
+        if len(self._chat_next) > 10000:
+            self._prune()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        self._chat_next = {
+            chat_id: next_allowed
+            for chat_id, next_allowed in self._chat_next.items()
+            if next_allowed > now
+        }
+
+
+@dataclass(slots=True)
+class Delivery:
+    """Итог send_with_retries: status - sent, blocked или failed."""
+    status: str = 'failed'
+    retries: int = 0
+
+
+async def send_with_retries(
+    limiter: TelegramRateLimiter,
+    chat_id: int,
+    send: Callable[[], Awaitable[Any]],
+    retries: int = 3,
+    backoff: float = 1,
+    acquired: bool = False
+) -> Delivery:
+    """Отправляет через limiter с повторами, общими для рассылок и уведомлений.
+
+    Каждая попытка, в том числе повтор после RetryAfter, заново проходит
+    limiter.acquire. На RetryAfter общий лимит ставится на паузу, сетевые
+    ошибки повторяются с экспоненциальной задержкой. acquired - вызывающий
+    уже дождался limiter для первой попытки.
+    """
+    delivery = Delivery()
+    for attempt in range(retries):
+        if attempt or not acquired:
+            await limiter.acquire(chat_id)
+        try:
+            await send()
+            delivery.status = 'sent'
+            return delivery
+        except TelegramRetryAfter as e:
+            delivery.retries += 1
+            logger.warning(
+                f'Flood control for chat {chat_id}, retry in {e.retry_after}s'
+            )
+            limiter.bucket.pause(e.retry_after)
+            await asyncio.sleep(e.retry_after)
+        except TelegramForbiddenError:
+            delivery.status = 'blocked'
+            return delivery
+        except TelegramNetworkError as e:
+            delivery.retries += 1
+            logger.warning(f'Network error sending to {chat_id}: {e}')
+            await asyncio.sleep(backoff * 2 ** attempt)
+        except TelegramAPIError as e:
+            logger.error(f'Error sending message to {chat_id}: {e}')
+            break
+        except Exception as e:
+            # Упавший отправщик рассылки больше не разбирал бы очередь.
+            logger.exception(
+                f'Unexpected error sending message to {chat_id}: {e}'
+            )
+            break
+    return delivery
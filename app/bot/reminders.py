@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from app.bot.notifications import notify_batch
+from app.config import settings
+from app.dao.dao import BookingDAO, TimeSlotUserDAO
+from app.dao.database import async_session_maker
+from loguru import logger
+
+
+async def send_reminders_job():
+    """Одна периодическая задача на все напоминания о бронях.
+
+    Берет брони, начинающиеся в ближайшие REMINDER_LEAD минут, порциями
+    по REMINDER_CHUNK, помечает их и публикует напоминания одной пачкой
+    на порцию.
+    """
+    now = datetime.now()
+    window_end = now + timedelta(minutes=settings.REMINDER_LEAD)
+    total = 0
+    async with async_session_maker() as session:
+        slots = {
+            slot.id: slot
+            for slot in await TimeSlotUserDAO(session).find_all()
+        }
+        dao = BookingDAO(session)
+        while True:
+            claimed = await dao.claim_reminders(
+                now, window_end, settings.REMINDER_CHUNK
+            )
+            if not claimed:
+                break
+            await notify_batch('reminder', [
+                (
+                    user_id,
+                    f'⏰ Напоминаем о брони столика на {booking_date} '
+                    f'с {slots[time_slot_id].start_time} до '
+                    f'{slots[time_slot_id].end_time}.'
+                )
+                for _, user_id, booking_date, time_slot_id in claimed
+            ])
+            await session.commit()
+            total += len(claimed)
+            if len(claimed) < settings.REMINDER_CHUNK:
+                break
+    if total:
+        logger.info('Sent {} booking reminders', total)
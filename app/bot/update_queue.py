@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+from loguru import logger
+
+
+def get_partition_key(update: Update) -> int:
+    """Ключ, по которому апдейты одного чата/пользователя идут по порядку."""
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.chat_id is not None:
+        return context.chat_id
+    if context.user_id is not None:
+        return context.user_id
+    return update.update_id
+
+
+class UpdateQueue:
+    """Ограниченная очередь апдейтов перед dp.feed_update.
+
+    У каждого чата своя очередь (партиция), которую разбирает одна задача,
+    поэтому апдейты одного чата обрабатываются строго по порядку и
+    переходы состояний диалога не гоняются между собой. Разные чаты
+    обрабатываются параллельно, но не больше concurrency апдейтов
+    одновременно. Всего в очередях может ждать не больше maxsize апдейтов:
+    put() ждет свободного места до put_timeout секунд и возвращает False,
+    если оно так и не появилось.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        concurrency: int = 8,
+        maxsize: int = 1000,
+        put_timeout: float = 5
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.put_timeout = put_timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._capacity = asyncio.Semaphore(maxsize)
+        self._partitions: dict[int, deque[Update]] = {}
+        self._drainers: dict[int, asyncio.Task] = {}
+        self.max_depth = 0
+        self.processed = 0
+
+    async def stop(self) -> None:
+        """Дожидается обработки всех апдейтов, уже стоящих в очереди."""
+        while self._drainers:
+            await asyncio.gather(
+                *self._drainers.values(),
+                return_exceptions=True
+            )
+
+    async def put(self, update: Update) -> bool:
+        try:
+            await asyncio.wait_for(self._capacity.acquire(), self.put_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'Update queue is full, update {update.update_id} rejected')
+            return False
+        key = get_partition_key(update)
+        partition = self._partitions.setdefault(key, deque())
+        partition.append(update)
+        self.max_depth = max(self.max_depth, len(partition))
+        if key not in self._drainers:
+            self._drainers[key] = asyncio.create_task(self._drain(key))
+        return True
+
+    def qsize(self) -> int:
+        return sum(len(partition) for partition in self._partitions.values())
+
+    def depths(self) -> dict[int, int]:
+        """Глубина очереди каждой активной партиции."""
+        return {
+            key: len(partition) for key, partition in self._partitions.items()
+        }
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'partitions': len(self._partitions),
+            'queued': self.qsize(),
+            'max_depth': self.max_depth,
+            'processed': self.processed
+        }
+
+    async def _drain(self, key: int) -> None:
+        partition = self._partitions[key]
+        try:
+            while partition:
+                update = partition[0]
+                try:
+                    async with self._semaphore:
+                        await self.dp.feed_update(self.bot, update)
+                except Exception as e:
+                    logger.exception(f'Error processing update {update.update_id}: {e}')
+                finally:
+                    partition.popleft()
+                    self._capacity.release()
+                    self.processed += 1
+        finally:
+            del self._partitions[key]
+            del self._drainers[key]
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime
+
+import uvicorn
+from app.bot.reminders import send_reminders_job
+from app.config import get_scheduler, settings
+from app.dao.dao import BookingDAO, SchedulerLeaseDAO, WorkerStatusDAO
+from app.dao.database import async_session_maker
+from app.dao.database_middleware import DatabaseMiddleware
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_STOPPED
+from loguru import logger
+
+SCHEDULER_LEASE = 'scheduler'
+
+
+async def complete_past_bookings_job():
+    async with async_session_maker() as session:
+        await BookingDAO(session).complete_past_bookings()
+
+
+async def clear_expired_fsm_job():
+    # Импорт здесь: workers не тянет create_bot с ботом и роутерами.
+    from app.bot.create_bot import storage
+    await storage.clear_expired()
+
+
+class WorkerCoordinator:
+    """Пульс воркера и выбор лидера, который запускает периодические задачи.
+
+    Каждый процесс раз в HEARTBEAT_INTERVAL секунд продлевает аренду
+    scheduler в БД. Воркер, удерживающий аренду, держит scheduler
+    запущенным, остальные - на паузе, так что задачи выполняются ровно
+    одним процессом. Если продление упало или не уложилось в срок аренды
+    по локальным часам, лидер сразу ставит scheduler на паузу, не дожидаясь,
+    пока аренду заберет другой воркер. Заодно воркер пишет в worker_status
+    свою статистику.
+    """
+
+    def __init__(self, database_middleware: DatabaseMiddleware, update_queue):
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.database_middleware = database_middleware
+        self.update_queue = update_queue
+        self.is_leader = False
+        self._lease_deadline = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        # Пауза оставляла бы jobstore открытым до выхода процесса. Идущие
+        # задачи не ждем: их повторит следующий лидер.
+        scheduler = get_scheduler()
+        if scheduler.state != STATE_STOPPED:
+            scheduler.shutdown(wait=False)
+        if self.is_leader:
+            async with async_session_maker() as session:
+                await SchedulerLeaseDAO(session).release(
+                    SCHEDULER_LEASE, self.worker_id
+                )
+                await session.commit()
+            self.is_leader = False
+
+    async def _run(self) -> None:
+        while True:
+            # Лидер не ждет продления дольше, чем действует его аренда.
+            timeout = (
+                max(self._lease_deadline - time.monotonic(), 0)
+                if self.is_leader else settings.LEASE_TTL
+            )
+            try:
+                await asyncio.wait_for(self.tick(), timeout)
+            except Exception as e:
+                logger.exception(f'Worker {self.worker_id} heartbeat failed: {e!r}')
+                self._step_down()
+            await asyncio.sleep(settings.HEARTBEAT_INTERVAL)
+
+    def _step_down(self) -> None:
+        """Ставит scheduler на паузу, если аренду продлить не удалось."""
+        if self.is_leader:
+            logger.warning(
+                f'Worker {self.worker_id} could not renew scheduler lease, '
+                f'pausing scheduler'
+            )
+        self.is_leader = False
+        self._sync_scheduler()
+
+    async def tick(self) -> None:
+        started = time.monotonic()
+        async with async_session_maker() as session:
+            is_leader = await SchedulerLeaseDAO(session).try_acquire(
+                SCHEDULER_LEASE, self.worker_id, settings.LEASE_TTL
+            )
+            queue_stats = self.update_queue.stats()
+            db_stats = self.database_middleware.stats()
+            await WorkerStatusDAO(session).heartbeat(
+                self.worker_id,
+                is_leader=is_leader,
+                updates_processed=queue_stats['processed'],
+                updates_with_db=db_stats['updates_with_db'],
+                queued=queue_stats['queued']
+            )
+            await session.commit()
+        if is_leader != self.is_leader:
+            logger.info(
+                f'Worker {self.worker_id} '
+                f'{"became" if is_leader else "is no longer"} scheduler leader'
+            )
+        self.is_leader = is_leader
+        # Отсчет от начала запроса: аренда в БД могла начаться раньше ответа.
+        self._lease_deadline = started + settings.LEASE_TTL
+        self._sync_scheduler()
+
+    def _sync_scheduler(self) -> None:
+        scheduler = get_scheduler()
+        if not self.is_leader:
+            if scheduler.state not in (STATE_STOPPED, STATE_PAUSED):
+                scheduler.pause()
+            return
+        if scheduler.state == STATE_STOPPED:
+            scheduler.start()
+            scheduler.add_job(
+                complete_past_bookings_job,
+                'interval',
+                minutes=settings.COMPLETE_BOOKINGS_INTERVAL,
+                id='complete_past_bookings',
+                replace_existing=True
+            )
+            scheduler.add_job(
+                send_reminders_job,
+                'interval',
+                minutes=settings.REMINDER_INTERVAL,
+                id='send_reminders',
+                replace_existing=True
+            )
+            if settings.FSM_STORAGE == 'sql':
+                scheduler.add_job(
+                    clear_expired_fsm_job,
+                    'interval',
+                    minutes=settings.FSM_CLEAR_INTERVAL,
+                    id='clear_expired_fsm',
+                    replace_existing=True,
+                    next_run_time=datetime.now()
+                )
+        elif scheduler.state == STATE_PAUSED:
+            scheduler.resume()
+
+
+def run_workers() -> None:
+    """Запускает webhook-приложение, при WORKERS > 1 - через супервизор.
+
+    Супервизор сам ставит webhook и раздает апдейты воркерам по чатам,
+    см. app.api.supervisor.
+    """
+    uvicorn.run(
+        'app.api.webhook:app' if settings.WORKERS == 1
+        else 'app.api.supervisor:app',
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT
+    )
+
+
+if __name__ == '__main__':
+    run_workers()
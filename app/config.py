@@ -1,12 +1,17 @@
 import os
+import secrets
+from functools import cache
+from typing import TYPE_CHECKING
 from urllib.parse import quote
 
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from faststream.rabbit import RabbitBroker
-from loguru import logger
+from app.log import setup_logging
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from faststream.rabbit import RabbitBroker
+
 
 class Settings(BaseSettings):
     BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -15,8 +20,52 @@ class Settings(BaseSettings):
     INIT_DB: bool
     FORMAT_LOG: str = "{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}"
     LOG_ROTATION: str = "10 MB"
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    LOG_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'log.txt')
+    LOG_RATE_LIMITS: dict[str, float] = {'app.dao': 100}
     DB_URL: str = f'sqlite+aiosqlite:///{BASE_DIR}/data/db.sqlite3'
     STORE_URL: str = f'sqlite:///{BASE_DIR}/data/jobs.sqlite'
+    DB_ENGINE_PROFILE: bool = True
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    FSM_STORAGE: str = 'memory'
+    FSM_TTL: int = 86400
+    FSM_FLUSH_INTERVAL: float = 0.5
+    FSM_CACHE_SIZE: int = 10000
+    FSM_CLEAR_INTERVAL: int = 60
+    UPDATE_CONCURRENCY: int = 8
+    WEBHOOK_QUEUE_SIZE: int = 1000
+    WEBHOOK_PUT_TIMEOUT: float = 5
+    WEBHOOK_HOST: str = '0.0.0.0'
+    WEBHOOK_PORT: int = 8000
+    # Telegram присылает его в X-Telegram-Bot-Api-Secret-Token; без
+    # настройки каждый запуск берет случайный.
+    WEBHOOK_SECRET: str = Field(
+        default_factory=lambda: secrets.token_urlsafe(32)
+    )
+    WORKERS: int = 1
+    # Задается супервизором процессу воркера; порт воркера - WEBHOOK_PORT + 1 + индекс.
+    WORKER_INDEX: int | None = None
+    LEASE_TTL: int = 30
+    HEARTBEAT_INTERVAL: int = 10
+    COMPLETE_BOOKINGS_INTERVAL: int = 10
+    REMINDER_INTERVAL: int = 1
+    REMINDER_LEAD: int = 60
+    REMINDER_CHUNK: int = 1000
+    TELEGRAM_GLOBAL_RATE: float = 30
+    TELEGRAM_CHAT_INTERVAL: float = 1
+    BROADCAST_CONCURRENCY: int = 30
+    BROADCAST_CHUNK: int = 1000
+    SLOW_QUERY_THRESHOLD: float = 0.1
+    SQLITE_PRAGMAS: dict[str, str | int] = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+    }
     TABLES_JSON: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dao", "tables.json")
     SLOTS_JSON: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dao", "slots.json")
 
@@ -27,6 +76,16 @@ class Settings(BaseSettings):
     RABBITMQ_PORT: int
     VHOST: str
 
+    @model_validator(mode='after')
+    def check_workers(self) -> 'Settings':
+        # Состояние диалога в памяти теряется при перезапуске воркера
+        # и не видно остальным процессам.
+        if self.WORKERS > 1 and self.FSM_STORAGE != 'sql':
+            raise ValueError('WORKERS > 1 requires FSM_STORAGE=sql')
+        if self.HEARTBEAT_INTERVAL >= self.LEASE_TTL:
+            raise ValueError('HEARTBEAT_INTERVAL must be less than LEASE_TTL')
+        return self
+
     @property
     def rabbitmq_url(self) -> str:
         return (
@@ -48,16 +107,27 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-log_file_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "log.txt"
-)
-logger.add(
-    log_file_path,
-    format=settings.FORMAT_LOG,
-    level="INFO",
-    rotation=settings.LOG_ROTATION
-)
-broker = RabbitBroker(url=settings.rabbitmq_url)
-scheduler = AsyncIOScheduler(
-    jobstores={'default': SQLAlchemyJobStore(url=settings.STORE_URL)}
-)
+log_file_path = settings.LOG_FILE
+
+
+# Брокер, планировщик и файловый лог создаются при первом обращении, а не
+# при импорте: миграции и утилиты, которым нужны только settings, не
+# открывают jobs.sqlite и не тянут faststream/apscheduler.
+@cache
+def setup_logger() -> list[int]:
+    return setup_logging(settings, log_file_path)
+
+
+@cache
+def get_broker() -> 'RabbitBroker':
+    from faststream.rabbit import RabbitBroker
+    return RabbitBroker(url=settings.rabbitmq_url)
+
+
+@cache
+def get_scheduler() -> 'AsyncIOScheduler':
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    return AsyncIOScheduler(
+        jobstores={'default': SQLAlchemyJobStore(url=settings.STORE_URL)}
+    )
@@ -0,0 +1,138 @@
+from datetime import date
+from typing import Callable
+
+from app.dao.models import Booking, TimeSlot
+from loguru import logger
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+PENDING_KEY = 'pending_on_commit'
+
+
+class AvailabilityIndex:
+    """Индекс занятых слотов в памяти процесса.
+
+    Для каждой пары (table_id, date) хранится битовая маска, в которой
+    бит с номером time_slot_id выставлен, если слот забронирован.
+    """
+
+    def __init__(self):
+        self._booked: dict[tuple[int, date], int] = {}
+        self._slots: list[TimeSlot] = []
+        self.is_warm = False
+
+    async def warm(self, session: AsyncSession) -> None:
+        """Полностью перестраивает индекс по данным из БД."""
+        booked, slots = await self._load(session)
+        self._booked = booked
+        self._slots = slots
+        self.is_warm = True
+        logger.info(
+            'Availability index warmed: {} table/date pairs, {} slots',
+            len(booked), len(slots)
+        )
+
+    rebuild = warm
+
+    async def check(self, session: AsyncSession) -> set[tuple[int, date]]:
+        """Возвращает пары (table_id, date), расходящиеся с БД."""
+        booked, _ = await self._load(session)
+        mismatched = {
+            key for key in booked.keys() | self._booked.keys()
+            if booked.get(key, 0) != self._booked.get(key, 0)
+        }
+        if mismatched:
+            logger.warning(
+                f'Availability index out of sync for {len(mismatched)} '
+                f'table/date pairs'
+            )
+        return mismatched
+
+    @staticmethod
+    async def _load(
+        session: AsyncSession
+    ) -> tuple[dict[tuple[int, date], int], list[TimeSlot]]:
+        result = await session.execute(
+            select(
+                Booking.table_id,
+                Booking.date,
+                Booking.time_slot_id
+            ).where(Booking.status == 'booked')
+        )
+        booked: dict[tuple[int, date], int] = {}
+        for table_id, booking_date, time_slot_id in result.all():
+            key = (table_id, booking_date)
+            booked[key] = booked.get(key, 0) | (1 << time_slot_id)
+        slots_result = await session.execute(
+            select(TimeSlot).order_by(TimeSlot.id)
+        )
+        return booked, list(slots_result.scalars().all())
+
+    def is_booked(
+        self,
+        table_id: int,
+        booking_date: date,
+        time_slot_id: int
+    ) -> bool:
+        mask = self._booked.get((table_id, booking_date), 0)
+        return bool(mask & (1 << time_slot_id))
+
+    def available_slots(
+        self,
+        table_id: int,
+        booking_date: date
+    ) -> list[TimeSlot]:
+        mask = self._booked.get((table_id, booking_date), 0)
+        return [slot for slot in self._slots if not mask & (1 << slot.id)]
+
+    def mark_booked(
+        self,
+        table_id: int,
+        booking_date: date,
+        time_slot_id: int
+    ) -> None:
+        key = (table_id, booking_date)
+        self._booked[key] = self._booked.get(key, 0) | (1 << time_slot_id)
+
+    def release(
+        self,
+        table_id: int,
+        booking_date: date,
+        time_slot_id: int
+    ) -> None:
+        key = (table_id, booking_date)
+        mask = self._booked.get(key, 0) & ~(1 << time_slot_id)
+        if mask:
+            self._booked[key] = mask
+        else:
+            self._booked.pop(key, None)
+
+    def prune_before(self, booking_date: date) -> None:
+        """Удаляет из индекса все даты раньше указанной."""
+        for key in [key for key in self._booked if key[1] < booking_date]:
+            del self._booked[key]
+
+    def defer(self, session: AsyncSession, change: Callable[[], None]):
+        """Откладывает изменение индекса до коммита сессии."""
+        if self.is_warm:
+            on_commit(session, change)
+
+
+def on_commit(session: AsyncSession, change: Callable[[], None]) -> None:
+    """Выполняет change после успешного коммита сессии."""
+    session.sync_session.info.setdefault(PENDING_KEY, []).append(change)
+
+
+availability_index = AvailabilityIndex()
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending_changes(session: Session) -> None:
+    for change in session.info.pop(PENDING_KEY, []):
+        change()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_changes(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -1,37 +1,223 @@
-from typing import Generic, Type, TypeVar
+import inspect
+from typing import Any, Generic, Iterable, Iterator, Type, TypeVar
 
-from app.dao.database import Base
+from app.dao.availability import on_commit
+from app.dao.cache import TTLCache
+from app.dao.database import Base, get_insert
+from app.dao.metrics import tag_dao_method
 from loguru import logger
 from pydantic import BaseModel
 from sqlalchemy import delete as sqlalchemy_delete
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy import update as sqlalchemy_update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached
 
 T = TypeVar('T', bound=Base)
 
+_MISSING = object()
+
 
 class BaseDAO(Generic[T]):
     model: Type[T] = None
+    # Подклассы со справочными данными задают свой TTLCache.
+    cache: TTLCache | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Запросы внутри публичных методов DAO помечаются именем метода.
+        for name, method in inspect.getmembers(cls, inspect.iscoroutinefunction):
+            if not name.startswith('_'):
+                setattr(cls, name, tag_dao_method(method, f'{cls.__name__}.{name}'))
 
     def __init__(self, session: AsyncSession):
         self._session = session
         if self.model is None:
             raise ValueError('Model should be determined')
 
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        if cls.cache is not None:
+            cls.cache.clear()
+
+    async def _cache_get(self, key):
+        if self.cache is None:
+            return _MISSING
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            return value
+        if isinstance(value, list):
+            return [await self._attach(record) for record in value]
+        return await self._attach(value)
+
+    def _cache_set(self, key, value) -> None:
+        if self.cache is None:
+            return
+        if isinstance(value, list):
+            value = [self._detached_copy(record) for record in value]
+        else:
+            value = self._detached_copy(value)
+        self.cache.set(key, value)
+
+    def _detached_copy(self, record: T | None) -> T | None:
+        """Копия строки вне сессии: объекты вызывающего кода остаются в ней."""
+        if record is None:
+            return None
+        copy = self.model(**{
+            column.key: getattr(record, column.key)
+            for column in self.model.__mapper__.column_attrs
+        })
+        make_transient_to_detached(copy)
+        return copy
+
+    async def _attach(self, copy: T | None) -> T | None:
+        """Экземпляр из кэша, привязанный к сессии DAO без запроса в базу.
+
+        Уже загруженный в сессию объект возвращается как есть, чтобы не
+        затереть его несохраненные изменения.
+        """
+        if copy is None:
+            return None
+        existing = self._session.identity_map.get(sa_inspect(copy).key)
+        if existing is not None:
+            return existing
+        return await self._session.merge(copy, load=False)
+
     async def find_one_or_none_by_id(self, data_id: int):
+        cached = await self._cache_get(('id', data_id))
+        if cached is not _MISSING:
+            return cached
         try:
             query = select(self.model).filter_by(id=data_id)
             result = await self._session.execute(query)
             record = result.scalar_one_or_none()
-            log_message = (
-                f"Запись {self.model.__name__} с ID {data_id} "
-                f"{'найдена' if record else 'не найдена'}."
+            logger.debug(
+                'Запись {} с ID {} {}.',
+                self.model.__name__, data_id,
+                'найдена' if record else 'не найдена'
             )
-            logger.info(log_message)
+            self._cache_set(('id', data_id), record)
             return record
         except SQLAlchemyError as e:
             logger.error(f'Error searching record with ID {data_id}: {e}')
             raise
+
+    async def find_all(self, filters: BaseModel | None = None):
+        filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
+        key = ('all', tuple(sorted(filter_dict.items())))
+        cached = await self._cache_get(key)
+        if cached is not _MISSING:
+            return cached
+        try:
+            query = select(self.model).filter_by(**filter_dict)
+            result = await self._session.execute(query)
+            records = list(result.scalars().all())
+            logger.debug(
+                'Найдено {} записей {}.', len(records), self.model.__name__
+            )
+            self._cache_set(key, records)
+            return records
+        except SQLAlchemyError as e:
+            logger.error(f'Error searching records by {filter_dict}: {e}')
+            raise
+
+    async def add(self, values: BaseModel):
+        values_dict = values.model_dump(exclude_unset=True)
+        try:
+            new_instance = self.model(**values_dict)
+            self._session.add(new_instance)
+            await self._session.flush()
+            on_commit(self._session, self.invalidate_cache)
+            logger.info('Запись {} успешно добавлена.', self.model.__name__)
+            return new_instance
+        except SQLAlchemyError as e:
+            logger.error(f'Error adding record: {e}')
+            raise
+
+    @staticmethod
+    def _dump(values: BaseModel | dict[str, Any]) -> dict[str, Any]:
+        if isinstance(values, BaseModel):
+            return values.model_dump(exclude_unset=True)
+        return values
+
+    @staticmethod
+    def _chunks(
+        rows: list[dict[str, Any]],
+        chunk_size: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Пачки строк с одинаковым набором ключей.
+
+        executemany берет колонки из первой строки пачки, поэтому строки
+        с другим набором ключей идут отдельными пачками.
+        """
+        groups: dict[frozenset[str], list[dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        for group in groups.values():
+            for start in range(0, len(group), chunk_size):
+                yield group[start:start + chunk_size]
+
+    async def add_many(
+        self,
+        instances: Iterable[BaseModel | dict[str, Any]],
+        chunk_size: int = 500
+    ) -> int:
+        """Вставляет записи пачками, один INSERT на пачку."""
+        rows = [self._dump(values) for values in instances]
+        try:
+            for chunk in self._chunks(rows, chunk_size):
+                await self._session.execute(insert(self.model), chunk)
+            on_commit(self._session, self.invalidate_cache)
+            logger.info(
+                'Добавлено {} записей {}.', len(rows), self.model.__name__
+            )
+            return len(rows)
+        except SQLAlchemyError as e:
+            logger.error(f'Error adding records: {e}')
+            raise
+
+    async def upsert_many(
+        self,
+        instances: Iterable[BaseModel | dict[str, Any]],
+        index_elements: Iterable[str] = ('id',),
+        chunk_size: int = 500
+    ) -> int:
+        """INSERT ... ON CONFLICT DO UPDATE пачками по chunk_size записей.
+
+        При конфликте по index_elements обновляются все остальные
+        переданные колонки, поэтому повторный запуск идемпотентен.
+        Пачка передается параметрами executemany, а не в VALUES: так
+        скомпилированный запрос берется из кэша, а не собирается заново.
+        """
+        rows = [self._dump(values) for values in instances]
+        index_elements = list(index_elements)
+        dialect_insert = get_insert(self._session.bind.dialect.name)
+        try:
+            for chunk in self._chunks(rows, chunk_size):
+                query = dialect_insert(self.model)
+                update_columns = {
+                    column: getattr(query.excluded, column)
+                    for column in chunk[0]
+                    if column not in index_elements
+                }
+                if update_columns:
+                    query = query.on_conflict_do_update(
+                        index_elements=index_elements,
+                        set_=update_columns
+                    )
+                else:
+                    query = query.on_conflict_do_nothing(
+                        index_elements=index_elements
+                    )
+                await self._session.execute(query, chunk)
+            on_commit(self._session, self.invalidate_cache)
+            logger.info(
+                'Сохранено {} записей {}.', len(rows), self.model.__name__
+            )
+            return len(rows)
+        except SQLAlchemyError as e:
+            logger.error(f'Error upserting records: {e}')
+            raise
@@ -1,58 +1,189 @@
-from datetime import date, datetime
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator
 
+from app.dao.availability import availability_index, on_commit
 from app.dao.base import BaseDAO
-from app.dao.models import Booking, Table, TimeSlot, User
+from app.dao.cache import TTLCache
+from app.dao.database import get_insert
+from app.dao.models import (Booking, SchedulerLease, Table, TimeSlot, User,
+                            WorkerStatus)
+from app.dao.stats import booking_stats
 from loguru import logger
-from sqlalchemy import delete, func, select, update
+from pydantic import BaseModel
+from sqlalchemy import (and_, delete, func, literal, or_, select, text,
+                        tuple_, union_all, update)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import joinedload
 
 
+@dataclass(frozen=True, slots=True)
+class Reservation:
+    """Результат попытки забронировать слот."""
+    booking_id: int | None
+
+    @property
+    def conflict(self) -> bool:
+        return self.booking_id is None
+
+
 class UserDAO(BaseDAO[User]):
     model = User
 
+    async def get_id_chunk(
+        self,
+        chunk_size: int = 1000,
+        after: int | None = None
+    ) -> list[int]:
+        """Следующая порция id пользователей по ключу id после after."""
+        query = select(self.model.id).order_by(self.model.id).limit(chunk_size)
+        if after is not None:
+            query = query.where(self.model.id > after)
+        try:
+            result = await self._session.execute(query)
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f'Error getting user ids: {e}')
+            raise
+
 
 class TimeSlotUserDAO(BaseDAO[TimeSlot]):
     model = TimeSlot
+    cache = TTLCache(maxsize=256, ttl=600)
 
 
 class TableDAO(BaseDAO[Table]):
     model = Table
+    cache = TTLCache(maxsize=256, ttl=600)
+
+
+class SchedulerLeaseDAO(BaseDAO[SchedulerLease]):
+    model = SchedulerLease
+
+    async def try_acquire(self, name: str, holder: str, ttl: int) -> bool:
+        """Захватывает или продлевает аренду name для holder.
+
+        Аренду можно взять, если она свободна, истекла или уже
+        принадлежит holder. Все проверки выполняются одним upsert-ом.
+        """
+        now = datetime.now()
+        insert = get_insert(self._session.bind.dialect.name)
+        query = insert(self.model).values(
+            name=name,
+            holder=holder,
+            expires_at=now + timedelta(seconds=ttl)
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[self.model.name],
+            set_={
+                'holder': query.excluded.holder,
+                'expires_at': query.excluded.expires_at
+            },
+            where=or_(
+                self.model.holder == holder,
+                self.model.expires_at < now
+            )
+        ).returning(self.model.holder)
+        try:
+            result = await self._session.execute(query)
+            return result.scalar_one_or_none() == holder
+        except SQLAlchemyError as e:
+            logger.error(f'Error acquiring lease {name}: {e}')
+            raise
+
+    async def release(self, name: str, holder: str) -> None:
+        query = delete(self.model).filter_by(name=name, holder=holder)
+        await self._session.execute(query)
+
+
+class WorkerStatusDAO(BaseDAO[WorkerStatus]):
+    model = WorkerStatus
+
+    async def heartbeat(self, worker_id: str, **values) -> None:
+        insert = get_insert(self._session.bind.dialect.name)
+        query = insert(self.model).values(
+            worker_id=worker_id,
+            heartbeat_at=datetime.now(),
+            **values
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[self.model.worker_id],
+            set_={
+                column: getattr(query.excluded, column)
+                for column in ('heartbeat_at', *values)
+            }
+        )
+        try:
+            await self._session.execute(query)
+        except SQLAlchemyError as e:
+            logger.error(f'Error saving worker {worker_id} status: {e}')
+            raise
+
+    async def find_all_alive(self, timeout: int) -> list[WorkerStatus]:
+        query = select(self.model).where(
+            self.model.heartbeat_at > datetime.now() - timedelta(seconds=timeout)
+        ).order_by(self.model.worker_id)
+        result = await self._session.execute(query)
+        return list(result.scalars().all())
 
 
 class BookingDAO(BaseDAO[Booking]):
     model = Booking
+    free_slots_cache = TTLCache(maxsize=1024, ttl=60)
 
-    async def check_available_booking(
+    async def reserve_slot(
         self,
+        user_id: int,
         table_id: int,
         booking_date: date,
         time_slot_id: int
-    ):
+    ) -> Reservation:
+        """Атомарно бронирует слот одним INSERT ... ON CONFLICT DO NOTHING.
+
+        Конфликт определяет частичный уникальный индекс
+        uq_bookings_active_slot, поэтому из двух одновременных
+        подтверждений одного слота успешным будет только одно.
+        """
+        insert = get_insert(self._session.bind.dialect.name)
+        query = insert(self.model).values(
+            user_id=user_id,
+            table_id=table_id,
+            date=booking_date,
+            time_slot_id=time_slot_id,
+            status='booked'
+        ).on_conflict_do_nothing(
+            index_elements=['table_id', 'date', 'time_slot_id'],
+            index_where=text("status = 'booked'")
+        ).returning(self.model.id)
         try:
-            query = select(self.model).filter_by(
-                table_id=table_id,
-                date=booking_date,
-                time_slot_id=time_slot_id
-            )
             result = await self._session.execute(query)
-
-            if not result.scalars().all():
-                return True
-
-            for booking in result.scalars().all():
-                if booking.status == 'booked':
-                    return False
-                continue #  Why may be many bookings?
-            return True
+            booking_id = result.scalar_one_or_none()
         except SQLAlchemyError as e:
-            logger.error(f'Error checking booking: {e}')
+            logger.error(f'Error reserving slot: {e}')
+            raise
+        if booking_id is None:
+            logger.info(
+                'Slot {} of table {} on {} is already booked',
+                time_slot_id, table_id, booking_date
+            )
+        else:
+            availability_index.defer(
+                self._session,
+                lambda: availability_index.mark_booked(
+                    table_id, booking_date, time_slot_id
+                )
+            )
+            booking_stats.record(self._session, None, 'booked')
+            on_commit(self._session, self.free_slots_cache.clear)
+        return Reservation(booking_id=booking_id)
 
     async def get_available_time_slots(
         self,
         table_id: int,
         booking_date: date
     ):
+        if availability_index.is_warm:
+            return availability_index.available_slots(table_id, booking_date)
         try:
             booking_query = select(self.model).filter_by(
                 table_id=table_id,
@@ -74,6 +205,100 @@ class BookingDAO(BaseDAO[Booking]):
         except SQLAlchemyError as e:
             logger.error(f'Error getting available timeslots: {e}')
 
+    async def search_tables(
+        self,
+        party_size: int,
+        booking_date: date,
+        start_time: time | None = None,
+        end_time: time | None = None
+    ) -> list[tuple[Table, int]]:
+        """Столы вместимостью от party_size со свободными слотами на дату.
+
+        Все подходящие столы и их свободные слоты считаются одним запросом:
+        столы x слоты с LEFT JOIN на активные брони. Возвращает пары
+        (стол, число свободных слотов), сначала самые подходящие по
+        вместимости, затем самые свободные.
+        """
+        slots = await TimeSlotUserDAO(self._session).find_all()
+        slot_ids = [
+            slot.id for slot in slots
+            if (start_time is None or start_time <= datetime.strptime(
+                slot.start_time, '%H:%M').time())
+            and (end_time is None or datetime.strptime(
+                slot.end_time, '%H:%M').time() <= end_time)
+        ]
+        if not slot_ids:
+            return []
+        free_slots = func.count(TimeSlot.id).label('free_slots')
+        query = select(Table, free_slots).join(
+            TimeSlot,
+            TimeSlot.id.in_(slot_ids)
+        ).outerjoin(
+            self.model,
+            and_(
+                self.model.table_id == Table.id,
+                self.model.time_slot_id == TimeSlot.id,
+                self.model.date == booking_date,
+                self.model.status == 'booked'
+            )
+        ).where(
+            Table.capacity >= party_size,
+            self.model.id.is_(None)
+        ).group_by(Table.id).order_by(
+            Table.capacity - party_size,
+            free_slots.desc(),
+            Table.id
+        )
+        try:
+            result = await self._session.execute(query)
+            return [tuple(row) for row in result.all()]
+        except SQLAlchemyError as e:
+            logger.error(f'Error searching tables: {e}')
+            return []
+
+    async def get_free_slot_counts(
+        self,
+        table_id: int,
+        start_date: date,
+        end_date: date
+    ) -> dict[date, int]:
+        """Количество свободных слотов стола на каждый день диапазона.
+
+        Без прогретого индекса доступности считается одним GROUP BY по
+        датам, результат кэшируется на (стол, диапазон).
+        """
+        days = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        if availability_index.is_warm:
+            return {
+                day: len(availability_index.available_slots(table_id, day))
+                for day in days
+            }
+        key = (table_id, start_date, end_date)
+        cached = self.free_slots_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            total = len(await TimeSlotUserDAO(self._session).find_all())
+            query = select(
+                self.model.date,
+                func.count(self.model.id)
+            ).where(
+                self.model.table_id == table_id,
+                self.model.status == 'booked',
+                self.model.date.between(start_date, end_date)
+            ).group_by(self.model.date)
+            result = await self._session.execute(query)
+            booked = dict(result.all())
+        except SQLAlchemyError as e:
+            logger.error(f'Error counting free slots: {e}')
+            return {}
+        free_counts = {day: total - booked.get(day, 0) for day in days}
+        self.free_slots_cache.set(key, free_counts)
+        return free_counts
+
     async def get_booking_with_details(self, user_id: int):
         try:
             query = select(self.model).options(
@@ -86,80 +311,277 @@ class BookingDAO(BaseDAO[Booking]):
             logger.error(f'Error getting booking with details: {e}')
             return []
 
-    async def complete_past_bookings(self):
-        try:
-            now = datetime.now()
-            subquery = select(TimeSlot.start_time).where(
-                TimeSlot.id == self.model.time_slot_id
-            ).scalar_subquery()
-            query = select(Booking.id).where(
-                Booking.date < now.date(),
-                self.model.status == 'booked'
-            ).union_all(
-                select(Booking.id).where(
-                    self.model.date == now.date(),
-                    subquery < now.time(),
-                    self.model.status == 'booked'
-                )
+    def _user_bookings_query(
+        self,
+        user_id: int,
+        status: str | None = None,
+        upcoming_only: bool = False
+    ):
+        query = select(self.model).options(
+            joinedload(self.model.table),
+            joinedload(self.model.time_slot)
+        ).filter_by(user_id=user_id)
+        if status is not None:
+            query = query.filter_by(status=status)
+        if upcoming_only:
+            query = query.where(self.model.date >= date.today())
+        return query.order_by(self.model.date, self.model.id)
+
+    async def get_bookings_page(
+        self,
+        user_id: int,
+        after: tuple[date, int] | None = None,
+        limit: int = 10,
+        status: str | None = None,
+        upcoming_only: bool = False
+    ) -> tuple[list[Booking], tuple[date, int] | None]:
+        """Страница броней пользователя по ключу (date, id).
+
+        after - курсор из предыдущей страницы. Запрашивается на одну запись
+        больше limit, чтобы понять, есть ли следующая страница. Возвращает
+        брони и курсор следующей страницы или None.
+        """
+        query = self._user_bookings_query(user_id, status, upcoming_only)
+        if after is not None:
+            query = query.where(
+                tuple_(self.model.date, self.model.id) > tuple_(*after)
             )
-            result = await self._session.execute(query)
-            booking_ids_to_update = result.scalars().all()
+        try:
+            result = await self._session.execute(query.limit(limit + 1))
+            bookings = list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f'Error getting bookings page: {e}')
+            return [], None
+        if len(bookings) <= limit:
+            return bookings, None
+        bookings = bookings[:limit]
+        return bookings, (bookings[-1].date, bookings[-1].id)
 
-            if booking_ids_to_update:
-                update_query = update(Booking).where(
-                    Booking.id.in_(booking_ids_to_update)
-                ).values(status='completed')
-                await self._session.execute(update_query)
+    async def stream_bookings(
+        self,
+        user_id: int,
+        status: str | None = None,
+        upcoming_only: bool = False,
+        batch_size: int = 500
+    ) -> AsyncIterator[Booking]:
+        """Потоково отдает брони пользователя, например для выгрузки."""
+        query = self._user_bookings_query(
+            user_id, status, upcoming_only
+        ).execution_options(yield_per=batch_size)
+        result = await self._session.stream_scalars(query)
+        async for booking in result:
+            yield booking
+
+    async def complete_past_bookings(
+        self,
+        chunk_size: int = 5000
+    ) -> list[int]:
+        """Переводит прошедшие брони в статус completed порциями.
+
+        Каждая порция обновляется одним UPDATE ... WHERE id IN
+        (SELECT ... LIMIT chunk_size) и сразу коммитится. Возвращает
+        количество обновленных записей по порциям.
+        """
+        now = datetime.now()
+        chunk_counts = []
+        try:
+            slots = await TimeSlotUserDAO(self._session).find_all()
+            past_slot_ids = [
+                slot.id for slot in slots
+                if datetime.strptime(slot.start_time, '%H:%M').time()
+                < now.time()
+            ]
+            expired = select(self.model.id).where(
+                self.model.status == 'booked',
+                or_(
+                    self.model.date < now.date(),
+                    and_(
+                        self.model.date == now.date(),
+                        self.model.time_slot_id.in_(past_slot_ids)
+                    )
+                )
+            ).limit(chunk_size)
+            update_query = update(self.model).where(
+                self.model.id.in_(expired.scalar_subquery())
+            ).values(status='completed').returning(
+                self.model.table_id,
+                self.model.date,
+                self.model.time_slot_id
+            ).execution_options(synchronize_session=False)
+            while True:
+                result = await self._session.execute(update_query)
+                completed = result.all()
+                for slot in completed:
+                    availability_index.defer(
+                        self._session,
+                        lambda slot=tuple(slot): (
+                            availability_index.release(*slot)
+                        )
+                    )
+                booking_stats.record(
+                    self._session, 'booked', 'completed', len(completed)
+                )
                 await self._session.commit()
+                if not completed:
+                    break
+                chunk_counts.append(len(completed))
+                if len(completed) < chunk_size:
+                    break
+            availability_index.prune_before(now.date())
+            if chunk_counts:
                 logger.info(
-                    f'Status updated for {len(booking_ids_to_update)} bookings'
+                    'Status updated for {} bookings in {} chunks',
+                    sum(chunk_counts), len(chunk_counts)
                 )
             else:
                 logger.info('No bookings to update status')
+            return chunk_counts
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при обновлении статуса бронирований: {e}")
-            await self._sesion.rollback()
+            await self._session.rollback()
+            return chunk_counts
+
+    async def claim_reminders(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        chunk_size: int = 1000
+    ) -> list[tuple[int, int, date, int]]:
+        """Помечает порцию броней, начинающихся в окне, как напомненные.
+
+        Окно переводится в пары (дата, слот) по списку слотов, выборка идет
+        по частичному индексу ix_bookings_reminder_due, по подзапросу на
+        каждый день окна: через OR SQLite берет из индекса только статус.
+        Возвращаются только
+        строки, которые этот вызов действительно пометил:
+        (id, user_id, date, time_slot_id), поэтому повторный или
+        параллельный запуск не отправит напоминание дважды.
+        """
+        slots = await TimeSlotUserDAO(self._session).find_all()
+        due = []
+        day = window_start.date()
+        while day <= window_end.date():
+            slot_ids = [
+                slot.id for slot in slots
+                if window_start <= datetime.combine(
+                    day, datetime.strptime(slot.start_time, '%H:%M').time()
+                ) < window_end
+            ]
+            if slot_ids:
+                due.append(select(self.model.id).where(
+                    # Литерал, а не параметр: иначе SQLite не докажет условие
+                    # частичного индекса и не станет его использовать.
+                    self.model.status == literal('booked', literal_execute=True),
+                    self.model.reminder_sent_at.is_(None),
+                    self.model.date == day,
+                    self.model.time_slot_id.in_(slot_ids)
+                ))
+            day += timedelta(days=1)
+        if not due:
+            return []
+        claimable = (
+            due[0] if len(due) == 1 else union_all(*due)
+        ).limit(chunk_size)
+        query = update(self.model).where(
+            self.model.id.in_(claimable.scalar_subquery()),
+            self.model.reminder_sent_at.is_(None)
+        ).values(reminder_sent_at=datetime.now()).returning(
+            self.model.id,
+            self.model.user_id,
+            self.model.date,
+            self.model.time_slot_id
+        ).execution_options(synchronize_session=False)
+        try:
+            result = await self._session.execute(query)
+            return [tuple(row) for row in result.all()]
+        except SQLAlchemyError as e:
+            logger.error(f'Error claiming booking reminders: {e}')
+            raise
+
+    async def add(self, values: BaseModel):
+        new_booking = await super().add(values)
+        booking_stats.record(self._session, None, new_booking.status)
+        if new_booking.status == 'booked':
+            slot = (
+                new_booking.table_id,
+                new_booking.date,
+                new_booking.time_slot_id
+            )
+            availability_index.defer(
+                self._session,
+                lambda: availability_index.mark_booked(*slot)
+            )
+            on_commit(self._session, self.free_slots_cache.clear)
+        return new_booking
 
     async def cancel_book(self, book_id: int):
         try:
             query = (
                 update(self.model)
-                .filter_by(id=book_id)
+                .filter_by(id=book_id, status='booked')
                 .values(status='canceled')
+                .returning(
+                    self.model.table_id,
+                    self.model.date,
+                    self.model.time_slot_id
+                )
                 .execution_options(synchronize_session='fetch')
             )
             result = await self._session.execute(query)
+            canceled = result.all()
+            for slot in canceled:
+                availability_index.defer(
+                    self._session,
+                    lambda slot=tuple(slot): availability_index.release(*slot)
+                )
+            booking_stats.record(
+                self._session, 'booked', 'canceled', len(canceled)
+            )
+            if canceled:
+                on_commit(self._session, self.free_slots_cache.clear)
             await self._session.flush()
-            return result.rowcount
+            return len(canceled)
         except SQLAlchemyError as e:
             logger.error(f'Error deleting records: {e}')
             raise
 
     async def delete_book(self, book_id: int):
         try:
-            query = delete(self.model).filter_by(id=book_id)
+            query = delete(self.model).filter_by(id=book_id).returning(
+                self.model.table_id,
+                self.model.date,
+                self.model.time_slot_id,
+                self.model.status
+            )
             result = await self._session.execute(query)
-            logger.info(f"Удалено {result.rowcount} записей.")
+            deleted = result.all()
+            for table_id, booking_date, time_slot_id, status in deleted:
+                booking_stats.record(self._session, status, None)
+                if status == 'booked':
+                    availability_index.defer(
+                        self._session,
+                        lambda slot=(table_id, booking_date, time_slot_id): (
+                            availability_index.release(*slot)
+                        )
+                    )
+            if any(status == 'booked' for *_, status in deleted):
+                on_commit(self._session, self.free_slots_cache.clear)
+            logger.info('Удалено {} записей.', len(deleted))
             await self._session.flush()
-            return result.rowcount
+            return len(deleted)
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при удалении записей: {e}")
             raise
 
     async def book_count(self) -> dict[str, int]:
+        # Счетчики прогреваются только в start_bot при одном процессе:
+        # в остальных процессах они не видели бы чужих изменений.
+        if booking_stats.is_warm:
+            return booking_stats.snapshot()
         try:
-            status_counts = {}
-            statuses = ['booked', 'completed', 'canceled']
-
-            for status in statuses:
-                query = select(
-                    func.count(self.model.id)
-                    ).where(self.model.status == status)
-                result = await self._session.execute(query)
-                count = result.scalar()
-                status_counts[status] = count
-                logger.info(f'Found {count} bookings with status {status}')
-                return status_counts
+            status_counts = await booking_stats.load(self._session)
+            logger.info('Found bookings by status: {}', status_counts)
+            return status_counts
         except SQLAlchemyError as e:
             logger.error(f'Error counting bookings with statuses: {e}')
             raise
@@ -1,16 +1,57 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
+from typing import Any, Callable, Iterable
 
 from app.config import settings
-from sqlalchemy import TIMESTAMP, func, inspect
+from app.dao.metrics import instrument_engine
+from sqlalchemy import TIMESTAMP, event, func, inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import (AsyncAttrs, AsyncSession,
                                     async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-engine = create_async_engine(url=settings.DB_URL)
+
+def get_engine_options() -> dict:
+    """Параметры пула соединений из профиля движка в настройках."""
+    if not settings.DB_ENGINE_PROFILE or settings.DB_URL.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def get_insert(dialect_name: str) -> Callable:
+    """insert() с поддержкой ON CONFLICT для диалекта движка."""
+    if dialect_name == 'postgresql':
+        return postgresql_insert
+    return sqlite_insert
+
+
+engine = create_async_engine(url=settings.DB_URL, **get_engine_options())
+if settings.DB_ENGINE_PROFILE and engine.dialect.name == 'sqlite':
+    event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+instrument_engine(engine.sync_engine)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession)
 
+_converters: dict[type, Callable[[Any], Any]] = {
+    datetime: datetime.isoformat,
+    Decimal: float,
+    uuid.UUID: str,
+}
+_dict_plans: dict[tuple, tuple] = {}
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
@@ -25,17 +66,84 @@ class Base(AsyncAttrs, DeclarativeBase):
         onupdate=func.now()
     )
 
-    def to_dict(self, exclude_none: bool = False):
-        result = {}
-        for column in inspect(self.__class__).columns:
-            value = getattr(self, column.key)
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            elif isinstance(value, Decimal):
-                value = float(value)
-            elif isinstance(value, uuid.UUID):
-                value = str(value)
-
-            if not exclude_none or value is not None:
-                result[column.key] = value
-        return result
+    @classmethod
+    def _dict_plan(
+        cls,
+        include: frozenset[str] | None = None,
+        exclude: frozenset[str] | None = None
+    ) -> tuple[tuple[str, Callable[[Any], Any] | None], ...]:
+        """Список (ключ колонки, конвертер), собранный один раз на модель."""
+        key = (cls, include, exclude)
+        plan = _dict_plans.get(key)
+        if plan is None:
+            plan = []
+            for column in inspect(cls).columns:
+                if include is not None and column.key not in include:
+                    continue
+                if exclude is not None and column.key in exclude:
+                    continue
+                try:
+                    python_type = column.type.python_type
+                except NotImplementedError:
+                    python_type = None
+                converter = None
+                for value_type, type_converter in _converters.items():
+                    if python_type is not None and issubclass(
+                        python_type, value_type
+                    ):
+                        converter = type_converter
+                        break
+                plan.append((column.key, converter))
+            plan = _dict_plans[key] = tuple(plan)
+        return plan
+
+    def to_dict(
+        self,
+        exclude_none: bool = False,
+        include: Iterable[str] | None = None,
+        exclude: Iterable[str] | None = None
+    ) -> dict[str, Any]:
+        if include is None and exclude is None:
+            # Быстрый путь без frozenset и списка из одной строки.
+            cls = type(self)
+            plan = _dict_plans.get((cls, None, None)) or cls._dict_plan()
+        else:
+            plan = self._dict_plan(
+                frozenset(include) if include is not None else None,
+                frozenset(exclude) if exclude is not None else None
+            )
+        return _row_dict(self, plan, exclude_none)
+
+    @classmethod
+    def to_dicts(
+        cls,
+        rows: Iterable['Base'],
+        exclude_none: bool = False,
+        include: Iterable[str] | None = None,
+        exclude: Iterable[str] | None = None
+    ) -> list[dict[str, Any]]:
+        plan = cls._dict_plan(
+            frozenset(include) if include is not None else None,
+            frozenset(exclude) if exclude is not None else None
+        )
+        return [_row_dict(row, plan, exclude_none) for row in rows]
+
+
+def _row_dict(
+    row: Base,
+    plan: tuple[tuple[str, Callable[[Any], Any] | None], ...],
+    exclude_none: bool
+) -> dict[str, Any]:
+    # Загруженные значения берутся из __dict__ экземпляра в обход
+    # дескрипторов ORM, просроченные и незагруженные - через getattr.
+    loaded = row.__dict__
+    row_dict = {}
+    for key, converter in plan:
+        value = loaded[key] if key in loaded else getattr(row, key)
+        if value is None:
+            if exclude_none:
+                continue
+        elif converter is not None:
+            value = converter(value)
+        row_dict[key] = value
+    return row_dict
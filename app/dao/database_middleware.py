@@ -1,45 +1,77 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from app.dao.database import async_session_maker
 
 
-class BaseDatabaseMiddleware(BaseMiddleware):
+class LazySession:
+    """Прокси AsyncSession, который открывает сессию при первом обращении."""
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self._session_maker = session_maker
+        self._session: AsyncSession | None = None
+        self.commit_on_exit = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_maker()
+        return getattr(self._session, name)
+
+
+class CommitOnExitSession:
+    """Та же ленивая сессия, но с коммитом после хендлера, если она использовалась."""
+
+    def __init__(self, lazy_session: LazySession):
+        self._lazy_session = lazy_session
+
+    def __getattr__(self, name: str) -> Any:
+        self._lazy_session.commit_on_exit = True
+        return getattr(self._lazy_session, name)
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """Одна ленивая сессия на апдейт под ключами session_without_commit
+    и session_with_commit."""
+
+    def __init__(self):
+        self.updates_total = 0
+        self.updates_with_db = 0
+        self.commits = 0
+
     async def __call__(
             self,
             handler: Callable[[Message | CallbackQuery, Dict[str, Any]], Awaitable[Any]],
             event: Message | CallbackQuery,
             data: Dict[str, Any]
     ) -> Any:
-        async with async_session_maker() as session:
-            self.set_session(data, session)
-            try:
-                result = await handler(event, data)
-                await self.after_handler(session)
-                return result
-            except Exception as e:
+        session = LazySession(async_session_maker)
+        data['session_without_commit'] = session
+        data['session_with_commit'] = CommitOnExitSession(session)
+        self.updates_total += 1
+        try:
+            result = await handler(event, data)
+            if session.is_open and session.commit_on_exit:
+                await session.commit()
+                self.commits += 1
+            return result
+        except Exception as e:
+            if session.is_open:
                 await session.rollback()
-                raise e
-            finally:
+            raise e
+        finally:
+            if session.is_open:
+                self.updates_with_db += 1
                 await session.close()
 
-    def set_session(self, data: Dict[str, Any], session) -> None:
-        """Метод для установки сессии в словарь данных."""
-        raise NotImplementedError("Этот метод должен быть реализован в подклассах.")
-
-    async def after_handler(self, session) -> None:
-        """Метод для выполнения действий после вызова хендлера (например, коммит)."""
-        pass
-
-
-class DatabaseMiddlewareWithoutCommit(BaseDatabaseMiddleware):
-    def set_session(self, data: Dict[str, Any], session) -> None:
-        data['session_without_commit'] = session
-
-
-class DatabaseMiddlewareWithCommit(BaseDatabaseMiddleware):
-    def set_session(self, data: Dict[str, Any], session) -> None:
-        data['session_with_commit'] = session
-
-    async def after_handler(self, session) -> None:
-        await session.commit()
+    def stats(self) -> dict[str, int]:
+        """Сколько апдейтов действительно потребовали обращения к БД."""
+        return {
+            'updates_total': self.updates_total,
+            'updates_with_db': self.updates_with_db,
+            'commits': self.commits
+        }
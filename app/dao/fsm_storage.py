@@ -0,0 +1,284 @@
+import asyncio
+import json
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (BaseStorage, DefaultKeyBuilder,
+                                      KeyBuilder, StateType, StorageKey)
+from aiogram.types import TelegramObject
+from app.dao.database import get_insert
+from app.dao.models import FSMRecord
+from loguru import logger
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_UNSET = object()
+# Внутри апдейта запись откладывается до FSMFlushMiddleware, здесь
+# копятся ключи, записанные этим апдейтом.
+_update_keys: ContextVar[set[str] | None] = ContextVar(
+    'fsm_update_keys', default=None
+)
+
+
+class SQLAlchemyStorage(BaseStorage):
+    """FSM-хранилище в таблице fsm_storage.
+
+    Состояние и данные одного ключа лежат в одной строке, данные
+    сериализуются в компактный JSON. Записи копятся в памяти и сбрасываются
+    одним upsert-ом раз в flush_interval секунд, поэтому несколько
+    изменений за один апдейт превращаются в одну запись. При
+    flush_interval <= 0 изменения апдейта сбрасываются сразу после его
+    обработки через FSMFlushMiddleware. Строки, не обновлявшиеся дольше
+    ttl секунд, считаются устаревшими и удаляются.
+
+    Последние cache_size прочитанных или записанных строк держатся в
+    памяти, и чтение не ходит в БД. Кэш процесса не видит чужих записей,
+    это безопасно, пока апдейты одного чата обрабатывает один процесс:
+    супервизор закрепляет чаты за воркерами.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        key_builder: KeyBuilder | None = None,
+        ttl: int = 86400,
+        flush_interval: float = 0.5,
+        cache_size: int = 10000
+    ):
+        self.engine = engine
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.ttl = timedelta(seconds=ttl)
+        self.flush_interval = flush_interval
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._flushing: dict[str, dict[str, Any]] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self.cache_size = cache_size
+        # key -> (state, data, expires_at) последней записанной строки.
+        self._records: OrderedDict[
+            str, tuple[str | None, str | None, datetime]
+        ] = OrderedDict()
+        self._flushes = 0
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        await self._write(key, state=state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._read(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._write(
+            key,
+            data=json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        )
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._read(key)
+        return json.loads(data) if data else {}
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def _write(
+        self,
+        key: StorageKey,
+        state: Any = _UNSET,
+        data: Any = _UNSET
+    ) -> None:
+        storage_key = self.key_builder.build(key)
+        record = self._pending.setdefault(storage_key, {})
+        if state is not _UNSET:
+            record['state'] = state
+        if data is not _UNSET:
+            record['data'] = data
+        if self.flush_interval <= 0:
+            update_keys = _update_keys.get()
+            if update_keys is None:
+                await self.flush([storage_key])
+            else:
+                update_keys.add(storage_key)
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _read(self, key: StorageKey) -> tuple[str | None, str | None]:
+        storage_key = self.key_builder.build(key)
+        pending = {
+            **self._flushing.get(storage_key, {}),
+            **self._pending.get(storage_key, {})
+        }
+        if 'state' in pending and 'data' in pending:
+            return pending['state'], pending['data']
+        cached = self._cached(storage_key)
+        if cached is not None:
+            state, data = cached
+        else:
+            flushes = self._flushes
+            async with self.engine.connect() as connection:
+                result = await connection.execute(
+                    select(
+                        FSMRecord.state, FSMRecord.data, FSMRecord.expires_at
+                    ).where(
+                        FSMRecord.key == storage_key,
+                        FSMRecord.expires_at > datetime.now()
+                    )
+                )
+                row = result.one_or_none()
+            # Отсутствующая строка тоже кэшируется: без нее новый
+            # пользователь ходил бы в БД на каждом апдейте.
+            state, data, expires_at = (
+                row if row is not None else (None, None, datetime.max)
+            )
+            # Если пока шел запрос ключ записали, строка уже устарела.
+            if flushes == self._flushes and storage_key not in self._pending:
+                self._remember(storage_key, state, data, expires_at)
+        return pending.get('state', state), pending.get('data', data)
+
+    def _cached(self, storage_key: str) -> tuple[str | None, str | None] | None:
+        record = self._records.get(storage_key)
+        if record is None:
+            return None
+        state, data, expires_at = record
+        if expires_at <= datetime.now():
+            del self._records[storage_key]
+            return None
+        self._records.move_to_end(storage_key)
+        return state, data
+
+    def _remember(
+        self,
+        storage_key: str,
+        state: str | None,
+        data: str | None,
+        expires_at: datetime
+    ) -> None:
+        if self.cache_size <= 0:
+            return
+        self._records[storage_key] = (state, data, expires_at)
+        self._records.move_to_end(storage_key)
+        if len(self._records) > self.cache_size:
+            self._records.popitem(last=False)
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self, keys: Iterable[str] | None = None) -> None:
+        """Сбрасывает накопленные изменения в БД одним upsert-ом на ключ.
+
+        keys - сбросить только эти ключи, остальные ждут своего flush.
+        """
+        async with self._flush_lock:
+            if keys is None:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {
+                    key: self._pending.pop(key)
+                    for key in keys if key in self._pending
+                }
+            if not pending:
+                return
+            self._flushing = pending
+            expires_at = datetime.now() + self.ttl
+            insert = get_insert(self.engine.dialect.name)
+            try:
+                async with self.engine.begin() as connection:
+                    for storage_key, record in pending.items():
+                        query = insert(FSMRecord).values(
+                            key=storage_key,
+                            state=record.get('state'),
+                            data=record.get('data', '{}'),
+                            expires_at=expires_at
+                        )
+                        query = query.on_conflict_do_update(
+                            index_elements=[FSMRecord.key],
+                            set_={
+                                **{
+                                    column: getattr(query.excluded, column)
+                                    for column in record
+                                },
+                                'expires_at': query.excluded.expires_at
+                            }
+                        )
+                        await connection.execute(query)
+            except SQLAlchemyError as e:
+                logger.error(f'Error flushing FSM storage: {e}')
+                for storage_key, record in pending.items():
+                    self._pending[storage_key] = {
+                        **record, **self._pending.get(storage_key, {})
+                    }
+                raise
+            else:
+                self._flushes += 1
+                self._remember_flushed(pending, expires_at)
+            finally:
+                self._flushing = {}
+
+    def _remember_flushed(
+        self,
+        pending: dict[str, dict[str, Any]],
+        expires_at: datetime
+    ) -> None:
+        for storage_key, record in pending.items():
+            cached = self._cached(storage_key)
+            if cached is None and not ('state' in record and 'data' in record):
+                # Незаписанное поле осталось в БД прежним, а какое оно -
+                # неизвестно: следующее чтение возьмет строку из БД.
+                self._records.pop(storage_key, None)
+                continue
+            state, data = cached or (None, None)
+            self._remember(
+                storage_key,
+                record.get('state', state),
+                record.get('data', data),
+                expires_at
+            )
+
+    async def clear_expired(self) -> int:
+        """Удаляет состояния диалогов, не обновлявшиеся дольше ttl."""
+        async with self.engine.begin() as connection:
+            result = await connection.execute(
+                delete(FSMRecord).where(
+                    FSMRecord.expires_at <= datetime.now()
+                )
+            )
+        logger.info('Removed {} expired FSM records', result.rowcount)
+        return result.rowcount
+
+
+class FSMFlushMiddleware(BaseMiddleware):
+    """Сбрасывает записи SQLAlchemyStorage после обработки апдейта.
+
+    Регистрируется снаружи DatabaseMiddleware, поэтому к моменту записи
+    сессия апдейта уже закоммичена и закрыта. Иначе на SQLite запись
+    состояния из второго соединения ждала бы блокировку, которую держит
+    незавершенная транзакция того же апдейта, и падала по busy_timeout.
+    """
+
+    def __init__(self, storage: SQLAlchemyStorage):
+        self.storage = storage
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        update_keys: set[str] = set()
+        token = _update_keys.set(update_keys)
+        try:
+            return await handler(event, data)
+        finally:
+            _update_keys.reset(token)
+            if self.storage.flush_interval <= 0 and update_keys:
+                await self.storage.flush(update_keys)
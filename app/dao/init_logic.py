@@ -0,0 +1,27 @@
+import json
+
+from app.config import settings
+from app.dao.dao import TableDAO, TimeSlotUserDAO
+from app.dao.database import async_session_maker
+from loguru import logger
+
+
+def load_json(path: str) -> list[dict]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+async def init_db():
+    """Заполняет столы и временные слоты из TABLES_JSON и SLOTS_JSON.
+
+    Повторный запуск обновляет существующие записи по id.
+    """
+    tables = load_json(settings.TABLES_JSON)
+    slots = load_json(settings.SLOTS_JSON)
+    async with async_session_maker() as session:
+        await TableDAO(session).upsert_many(tables)
+        await TimeSlotUserDAO(session).upsert_many(slots)
+        await session.commit()
+    logger.info(
+        'База заполнена: {} столов, {} слотов.', len(tables), len(slots)
+    )
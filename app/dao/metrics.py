@@ -0,0 +1,52 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+from app.registry import registry
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+current_dao_method: ContextVar[str] = ContextVar(
+    'current_dao_method', default='unknown'
+)
+
+
+def tag_dao_method(method: Callable[..., Awaitable[Any]], name: str):
+    """Помечает запросы, выполненные внутри method, меткой name."""
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_dao_method.set(name)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            current_dao_method.reset(token)
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    method = current_dao_method.get()
+    registry.observe('dao_query_seconds', elapsed, method=method)
+    if elapsed >= settings.SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            f'Slow query in {method}: {elapsed * 1000:.1f} ms: {statement[:500]}'
+        )
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
@@ -1,7 +1,8 @@
 from datetime import datetime
 
 from app.dao.database import Base
-from sqlalchemy import BigInteger, Date, ForeignKey, Integer, String
+from sqlalchemy import (TIMESTAMP, BigInteger, Date, ForeignKey, Index, Integer,
+                        String, Text, text)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
@@ -24,7 +25,7 @@ class Table(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     capacity: Mapped[int]
     description: Mapped[str | None]
-    booking: Mapped[list['Booking']] = relationship(
+    bookings: Mapped[list['Booking']] = relationship(
         'Booking',
         back_populates='table'
     )
@@ -61,9 +62,65 @@ class Booking(Base):
     )
     date: Mapped[datetime] = mapped_column(Date)
     status: Mapped[str]
+    reminder_sent_at: Mapped[datetime | None] = mapped_column(TIMESTAMP)
     user: Mapped['User'] = relationship('User', back_populates='bookings')
     table: Mapped['Table'] = relationship('Table', back_populates='bookings')
     time_slot: Mapped['TimeSlot'] = relationship(
         'TimeSlot',
         back_populates='bookings'
     )
+
+    __table_args__ = (
+        Index('ix_bookings_table_date_slot', 'table_id', 'date', 'time_slot_id'),
+        Index('ix_bookings_user_date', 'user_id', 'date'),
+        Index('ix_bookings_status_date', 'status', 'date'),
+        Index(
+            'ix_bookings_reminder_due',
+            'status',
+            'date',
+            'time_slot_id',
+            sqlite_where=text(
+                "status = 'booked' AND reminder_sent_at IS NULL"
+            ),
+            postgresql_where=text(
+                "status = 'booked' AND reminder_sent_at IS NULL"
+            )
+        ),
+        Index(
+            'uq_bookings_active_slot',
+            'table_id',
+            'date',
+            'time_slot_id',
+            unique=True,
+            sqlite_where=text("status = 'booked'"),
+            postgresql_where=text("status = 'booked'")
+        ),
+    )
+
+
+class FSMRecord(Base):
+    __tablename__ = 'fsm_storage'
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    state: Mapped[str | None]
+    data: Mapped[str] = mapped_column(Text, default='{}')
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, index=True)
+
+
+class SchedulerLease(Base):
+    __tablename__ = 'scheduler_lease'
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str]
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP)
+
+
+class WorkerStatus(Base):
+    __tablename__ = 'worker_status'
+
+    worker_id: Mapped[str] = mapped_column(String, primary_key=True)
+    is_leader: Mapped[bool]
+    updates_processed: Mapped[int]
+    updates_with_db: Mapped[int]
+    queued: Mapped[int]
+    heartbeat_at: Mapped[datetime] = mapped_column(TIMESTAMP)
@@ -0,0 +1,66 @@
+from app.dao.availability import on_commit
+from app.dao.models import Booking
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+BOOKING_STATUSES = ('booked', 'completed', 'canceled')
+
+
+class BookingStats:
+    """Счетчики броней по статусам, обновляемые при смене статуса.
+
+    После warm() книга учета ведется в памяти, и статистика для
+    админки отдается без запросов к таблице bookings.
+    """
+
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self.is_warm = False
+
+    async def warm(self, session: AsyncSession) -> dict[str, int]:
+        self._counts = await self.load(session)
+        self.is_warm = True
+        return self.snapshot()
+
+    @staticmethod
+    async def load(session: AsyncSession) -> dict[str, int]:
+        """Число броней по статусам, известные статусы есть и с нулем."""
+        result = await session.execute(
+            select(Booking.status, func.count(Booking.id))
+            .group_by(Booking.status)
+        )
+        return {
+            **dict.fromkeys(BOOKING_STATUSES, 0),
+            **dict(result.all()),
+        }
+
+    def snapshot(self) -> dict[str, int]:
+        return dict(self._counts)
+
+    def record(
+        self,
+        session: AsyncSession,
+        from_status: str | None,
+        to_status: str | None,
+        count: int = 1
+    ) -> None:
+        """Учитывает смену статуса count броней после коммита сессии."""
+        if self.is_warm and count:
+            on_commit(
+                session,
+                lambda: self._apply(from_status, to_status, count)
+            )
+
+    def _apply(
+        self,
+        from_status: str | None,
+        to_status: str | None,
+        count: int
+    ) -> None:
+        if from_status is not None:
+            self._counts[from_status] = self._counts.get(from_status, 0) - count
+        if to_status is not None:
+            self._counts[to_status] = self._counts.get(to_status, 0) + count
+
+
+booking_stats = BookingStats()
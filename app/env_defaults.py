@@ -0,0 +1,26 @@
+"""Заглушки обязательных настроек для тестов, нагрузочного прогона и бенчмарков.
+
+Вызывается до первого импорта app.config: база, хранилище задач и
+файловый лог уходят во временный каталог, а не в data/ и app/log.txt.
+Уже заданные переменные окружения не перезаписываются.
+"""
+import os
+
+
+def set_env_defaults(directory: str, **overrides: str) -> None:
+    defaults = {
+        'DB_URL': f'sqlite+aiosqlite:///{directory}/db.sqlite3',
+        'STORE_URL': f'sqlite:///{directory}/jobs.sqlite',
+        'LOG_FILE': os.path.join(directory, 'log.txt'),
+        'BOT_TOKEN': '42:TEST',
+        'ADMIN_IDS': '[]',
+        'INIT_DB': 'false',
+        'BASE_URL': 'http://localhost',
+        'RABBITMQ_USERNAME': 'guest',
+        'RABBITMQ_PASSWORD': 'guest',
+        'RABBITMQ_HOST': 'localhost',
+        'RABBITMQ_PORT': '5672',
+        'VHOST': '/',
+    }
+    for name, value in {**defaults, **overrides}.items():
+        os.environ.setdefault(name, value)
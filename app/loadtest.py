@@ -0,0 +1,286 @@
+"""Нагрузочный прогон сценария бронирования через dp.feed_update.
+
+Тысячи синтетических пользователей проходят booking_dialog целиком
+(гости -> стол -> дата -> слот -> подтверждение) на временной SQLite,
+запросы к Bot API подменяются фейковой сессией. В конце печатается
+пропускная способность, p50/p95/p99 по шагам, число SQL-запросов на
+бронь и пиковый RSS. С --max-p99 прогон завершается с ошибкой, если
+p99 любого шага превышает порог.
+
+    python -m app.loadtest --users 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from app.env_defaults import set_env_defaults
+
+_db_dir = tempfile.mkdtemp(prefix='booking_loadtest_')
+# ADMIN_IDS остается пустым: TestRabbitBroker обрабатывает сообщение прямо
+# внутри publish, и с админами подтверждение ждало бы отправки уведомления.
+set_env_defaults(_db_dir, BOT_TOKEN='42:LOADTEST', LOG_LEVEL='WARNING')
+
+import types  # noqa: E402
+
+try:
+    import app.bot.user.kbs  # noqa: F401
+except ModuleNotFoundError:
+    # Хендлеры бронирования отвечают клавиатурой из app.bot.user, которой
+    # может не быть в дереве; прогону хватает сообщения без клавиатуры.
+    kbs = types.ModuleType('app.bot.user.kbs')
+    kbs.main_user_kb = lambda user_id: None
+    sys.modules.setdefault('app.bot.user', types.ModuleType('app.bot.user'))
+    sys.modules['app.bot.user.kbs'] = kbs
+
+from aiogram import Router  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.filters import Command  # noqa: E402
+from aiogram.types import (CallbackQuery, Chat, Message, Update,  # noqa: E402
+                           User)
+from aiogram_dialog import DialogManager, StartMode  # noqa: E402
+from app.bot.booking.dialog import booking_dialog  # noqa: E402
+from app.bot.booking.state import BookingState  # noqa: E402
+from app.bot.create_bot import bot, dp, start_bot  # noqa: E402
+from app.config import get_broker  # noqa: E402
+from app.dao.dao import TableDAO, TimeSlotUserDAO, UserDAO  # noqa: E402
+from app.dao.database import Base, async_session_maker, engine  # noqa: E402
+from faststream.rabbit import TestRabbitBroker  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+STEPS = ('start', 'capacity', 'table', 'date', 'slot', 'confirm')
+DAY_BUTTON = re.compile(r'^(\[ )?\d{2}( \])?$')
+
+
+class FakeSession(BaseSession):
+    """Сессия Bot API, которая ничего не отправляет и помнит клавиатуры."""
+
+    def __init__(self):
+        super().__init__()
+        self.last_message: dict[int, Message] = {}
+        self.texts: dict[int, list[str]] = defaultdict(list)
+        self._message_ids = itertools.count(1)
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_content(self, *args, **kwargs):
+        yield b''
+
+    async def make_request(self, bot, method, timeout=None):
+        if method.__returning__ is bool:
+            return True
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return True
+        message = Message(
+            message_id=getattr(method, 'message_id', None)
+            or next(self._message_ids),
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type='private'),
+            text=getattr(method, 'text', None),
+            reply_markup=getattr(method, 'reply_markup', None)
+        )
+        self.last_message[chat_id] = message
+        if message.text:
+            self.texts[chat_id].append(message.text)
+        return message
+
+
+router = Router()
+
+
+@router.message(Command('book'))
+async def start_booking(message: Message, dialog_manager: DialogManager):
+    await dialog_manager.start(BookingState.count, mode=StartMode.RESET_STACK)
+
+
+class LoadTest:
+    def __init__(self, session: FakeSession, seed: int):
+        self.session = session
+        self.random = random.Random(seed)
+        self.update_ids = itertools.count(1)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.booked = 0
+        self.failed = 0
+        self.errors = 0
+        self.queries = 0
+
+    def _buttons(self, user_id: int) -> list:
+        markup = self.session.last_message[user_id].reply_markup
+        keyboard = getattr(markup, 'inline_keyboard', None) or []
+        return [button for row in keyboard for button in row]
+
+    async def _feed(self, step: str, update: Update) -> None:
+        started = time.perf_counter()
+        await dp.feed_update(bot, update)
+        self.latencies[step].append(time.perf_counter() - started)
+
+    async def _click(self, step: str, user: User, predicate) -> bool:
+        buttons = [
+            button for button in self._buttons(user.id)
+            if button.callback_data and predicate(button.text)
+        ]
+        if not buttons:
+            return False
+        button = self.random.choice(buttons)
+        await self._feed(step, Update(
+            update_id=next(self.update_ids),
+            callback_query=CallbackQuery(
+                id=str(next(self.update_ids)),
+                from_user=user,
+                chat_instance='loadtest',
+                message=self.session.last_message[user.id],
+                data=button.callback_data
+            )
+        ))
+        return True
+
+    async def run_user(self, user_id: int) -> None:
+        user = User(id=user_id, is_bot=False, first_name=f'user{user_id}')
+        await self._feed('start', Update(
+            update_id=next(self.update_ids),
+            message=Message(
+                message_id=next(self.update_ids),
+                date=datetime.now(),
+                chat=Chat(id=user_id, type='private'),
+                from_user=user,
+                text='/book'
+            )
+        ))
+        capacity = str(self.random.randint(1, 6))
+        steps = [
+            ('capacity', lambda text: text == capacity),
+            ('table', lambda text: text.startswith('Стол №')),
+        ]
+        for step, predicate in steps:
+            if not await self._click(step, user, predicate):
+                self.failed += 1
+                return
+        for _ in range(3):
+            await self._click('date', user, DAY_BUTTON.match)
+            if await self._click('slot', user, lambda text: ' до ' in text):
+                break
+        else:
+            self.failed += 1
+            return
+        sent_before = len(self.session.texts[user_id])
+        await self._click('confirm', user, lambda text: text == 'Все верно')
+        if any(
+            text.startswith('Бронь успешно сохранена')
+            for text in self.session.texts[user_id][sent_before:]
+        ):
+            self.booked += 1
+        else:
+            self.failed += 1
+
+
+async def seed(users: int, tables: int) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with async_session_maker() as session:
+        await TableDAO(session).upsert_many(
+            {'id': table_id, 'capacity': table_id % 6 + 1,
+             'description': f'Стол {table_id}'}
+            for table_id in range(1, tables + 1)
+        )
+        await TimeSlotUserDAO(session).upsert_many(
+            {'id': hour, 'start_time': f'{hour:02d}:00',
+             'end_time': f'{hour + 1:02d}:00'}
+            for hour in range(10, 22)
+        )
+        await UserDAO(session).upsert_many(
+            {'id': user_id, 'first_name': f'user{user_id}'}
+            for user_id in range(1, users + 1)
+        )
+        await session.commit()
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def main(args) -> int:
+    session = FakeSession()
+    bot.session = session
+    await seed(args.users, args.tables)
+    loadtest = LoadTest(session, args.seed)
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def count_query(*_):
+        loadtest.queries += 1
+
+    broker = get_broker()
+    logging.getLogger('faststream.access.rabbit').setLevel(logging.WARNING)
+    async with TestRabbitBroker(broker):
+        # Роутеры user/admin не нужны сценарию бронирования.
+        await start_bot(routers=[booking_dialog, router])
+        loadtest.queries = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def run(user_id: int):
+            async with semaphore:
+                try:
+                    await loadtest.run_user(user_id)
+                except Exception as e:
+                    loadtest.errors += 1
+                    print(f'user {user_id}: {e!r}', file=sys.stderr)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(user_id) for user_id in range(1, args.users + 1)))
+        elapsed = time.perf_counter() - started
+        await dp.storage.close()
+
+    print(f'users: {args.users}, booked: {loadtest.booked}, '
+          f'failed: {loadtest.failed}, errors: {loadtest.errors}, '
+          f'time: {elapsed:.2f}s')
+    print(f'throughput: {loadtest.booked / elapsed:.1f} bookings/s, '
+          f'{sum(map(len, loadtest.latencies.values())) / elapsed:.1f} updates/s')
+    queries_per_booking = loadtest.queries / max(loadtest.booked, 1)
+    print(f'queries per booking: {queries_per_booking:.1f}')
+    print(f'peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB')
+    exit_code = 0
+    if loadtest.errors or not loadtest.booked:
+        exit_code = 1
+    if (
+        args.max_queries is not None
+        and queries_per_booking > args.max_queries
+    ):
+        exit_code = 1
+    for step in STEPS:
+        values = loadtest.latencies.get(step)
+        if not values:
+            continue
+        p99 = percentile(values, 0.99)
+        print(f'{step:>9}: p50 {percentile(values, 0.5) * 1000:7.2f} ms  '
+              f'p95 {percentile(values, 0.95) * 1000:7.2f} ms  '
+              f'p99 {p99 * 1000:7.2f} ms  n={len(values)}')
+        if args.max_p99 is not None and p99 * 1000 > args.max_p99:
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--tables', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--max-p99', type=float, default=None,
+        help='порог p99 любого шага в мс, при превышении код выхода 1'
+    )
+    parser.add_argument(
+        '--max-queries', type=float, default=None,
+        help='порог SQL-запросов на бронь, при превышении код выхода 1'
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,139 @@
+import asyncio
+import copy
+import queue
+import sys
+import threading
+import time
+from typing import Callable
+
+from loguru import logger
+
+
+class LogRateLimiter:
+    """Фильтр loguru, ограничивающий частоту записей по имени логгера.
+
+    limits задает для префикса имени модуля ('app.dao') допустимое число
+    записей в секунду, для модуля берется самый длинный подходящий
+    префикс. Предупреждения и ошибки пропускаются всегда. Число
+    отброшенных записей попадает в extra['dropped'] следующей записи
+    того же логгера.
+    """
+
+    def __init__(self, limits: dict[str, float]):
+        self.limits = limits
+        self._buckets: dict[str, list[float]] = {}
+        self._rates: dict[str, float | None] = {}
+        self._dropped: dict[str, int] = {}
+
+    def _rate(self, name: str) -> float | None:
+        if name not in self._rates:
+            prefixes = [
+                prefix for prefix in self.limits
+                if name == prefix or name.startswith(f'{prefix}.')
+            ]
+            self._rates[name] = (
+                self.limits[max(prefixes, key=len)] if prefixes else None
+            )
+        return self._rates[name]
+
+    def __call__(self, record) -> bool:
+        if record['level'].no >= logger.level('WARNING').no:
+            return True
+        name = record['name'] or ''
+        rate = self._rate(name)
+        if rate is None:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(name, [rate, now])
+        bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            self._dropped[name] = self._dropped.get(name, 0) + 1
+            return False
+        bucket[0] -= 1
+        dropped = self._dropped.pop(name, 0)
+        if dropped:
+            record['extra']['dropped'] = dropped
+        return True
+
+
+class QueuedSink:
+    """Sink loguru, который пишет готовые строки в фоновом потоке.
+
+    В event loop остаются форматирование записи и put в очередь. В
+    отличие от enqueue=True запись не проходит через pickle и канал
+    multiprocessing, это в несколько раз дешевле для вызывающего кода.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str], None],
+        close: Callable[[], None] | None = None
+    ):
+        self._write = write
+        self._close = close
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name='log-writer', daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while (message := self._queue.get()) is not None:
+            try:
+                self._write(message)
+            finally:
+                self._queue.task_done()
+        self._queue.task_done()
+
+    def write(self, message: str) -> None:
+        self._queue.put(str(message))
+
+    def stop(self) -> None:
+        """Дописывает очередь и останавливает поток, вызывается logger.remove."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._close is not None:
+            self._close()
+
+    async def complete(self) -> None:
+        """Ждет записи всего, что уже в очереди, для logger.complete()."""
+        await asyncio.to_thread(self._queue.join)
+
+
+def _write_stderr(message: str) -> None:
+    sys.stderr.write(message)
+    sys.stderr.flush()
+
+
+def setup_logging(settings, log_file_path: str) -> list[int]:
+    """Настраивает stderr и файловый sink с записью в фоновом потоке.
+
+    Записи форматируются в вызывающем потоке и через QueuedSink уходят в
+    поток записи. Файл пишет отдельная копия логгера, поэтому ротация
+    остается за loguru. При LOG_JSON записи пишутся в файл построчным
+    JSON.
+    """
+    logger.remove()
+    file_logger = copy.deepcopy(logger)
+    file_handler = file_logger.add(
+        log_file_path, format='{message}', rotation=settings.LOG_ROTATION
+    )
+    return [
+        logger.add(
+            QueuedSink(_write_stderr),
+            level=settings.LOG_LEVEL,
+            colorize=sys.stderr.isatty(),
+            filter=LogRateLimiter(settings.LOG_RATE_LIMITS)
+        ),
+        logger.add(
+            QueuedSink(
+                file_logger.opt(raw=True).info,
+                lambda: file_logger.remove(file_handler)
+            ),
+            format=settings.FORMAT_LOG,
+            level=settings.LOG_LEVEL,
+            serialize=settings.LOG_JSON,
+            filter=LogRateLimiter(settings.LOG_RATE_LIMITS)
+        ),
+    ]
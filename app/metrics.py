@@ -0,0 +1,72 @@
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (BaseRequestMiddleware,
+                                                     NextRequestMiddlewareType)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+# Гистограммы и хуки SQLAlchemy не зависят от aiogram и живут отдельно,
+# чтобы app.dao.database импортировался без него.
+from app.registry import Histogram, MetricsRegistry, registry  # noqa: F401
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """Замеряет время хендлера; для диалогов метка - состояние окна."""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_object = data.get('handler')
+            name = data.get('raw_state') or (
+                handler_object.callback.__name__ if handler_object else 'unhandled'
+            )
+            registry.observe(
+                'bot_handler_seconds',
+                time.perf_counter() - started,
+                event=type(event).__name__,
+                handler=name
+            )
+
+
+class TelegramTimingMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            registry.observe(
+                'telegram_api_seconds',
+                time.perf_counter() - started,
+                method=method.__api_method__
+            )
+
+
+def timed_getter(getter: Callable[..., Awaitable[dict]]):
+    """Декоратор геттера окна, пишущий его время в bot_getter_seconds."""
+    @wraps(getter)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await getter(*args, **kwargs)
+        finally:
+            registry.observe(
+                'bot_getter_seconds',
+                time.perf_counter() - started,
+                getter=getter.__name__
+            )
+    return wrapper
@@ -0,0 +1,99 @@
+import math
+
+
+class Histogram:
+    """Гистограмма в духе HDR: логарифмические корзины с подкорзинами.
+
+    Корзины покрывают диапазон от min_value до min_value * 2 ** octaves
+    секунд, каждая октава делится на sub_buckets частей, так что
+    относительная погрешность квантилей не больше 2 ** (1 / sub_buckets).
+    """
+
+    def __init__(
+        self,
+        min_value: float = 0.0001,
+        octaves: int = 21,
+        sub_buckets: int = 2
+    ):
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self.bounds = [
+            min_value * 2 ** (index / sub_buckets)
+            for index in range(octaves * sub_buckets + 1)
+        ]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(
+                math.ceil(math.log2(value / self.min_value) * self.sub_buckets),
+                len(self.bounds)
+            )
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.bounds[min(index, len(self.bounds) - 1)]
+        return 0.0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._help: dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def render_prometheus(self) -> str:
+        """Все гистограммы в текстовом формате Prometheus."""
+        lines = []
+        for name, series in self._histograms.items():
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in series.items():
+                label_text = ','.join(
+                    f'{key}="{value}"' for key, value in labels
+                )
+                prefix = f'{label_text},' if label_text else ''
+                cumulative = 0
+                for bound, bucket_count in zip(
+                    histogram.bounds, histogram.counts
+                ):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{name}_bucket{{{prefix}le="{bound:.6g}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}'
+                )
+                suffix = f'{{{label_text}}}' if label_text else ''
+                lines.append(f'{name}_sum{suffix} {histogram.sum}')
+                lines.append(f'{name}_count{suffix} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+registry.describe('bot_handler_seconds', 'Время обработки апдейта хендлером')
+registry.describe('bot_getter_seconds', 'Время работы геттера окна диалога')
+registry.describe('dao_query_seconds', 'Время выполнения SQL-запроса DAO')
+registry.describe('telegram_api_seconds', 'Время запроса к Bot API')
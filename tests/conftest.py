@@ -0,0 +1,46 @@
+import tempfile
+
+from app.env_defaults import set_env_defaults
+
+set_env_defaults(tempfile.mkdtemp(prefix='booking_tests_'))
+
+import pytest  # noqa: E402
+from app.dao.availability import availability_index  # noqa: E402
+from app.dao.dao import BookingDAO, TableDAO, TimeSlotUserDAO  # noqa: E402
+from app.dao.database import Base, set_sqlite_pragmas  # noqa: E402
+from app.dao.stats import booking_stats  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import (AsyncSession,  # noqa: E402
+                                    async_sessionmaker, create_async_engine)
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    """Отдельная SQLite с теми же pragma, что и у приложения."""
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/db.sqlite3')
+    event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(engine):
+    return async_sessionmaker(engine, class_=AsyncSession)
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Кэши DAO и индексы живут на уровне процесса, тесты их не делят."""
+    yield
+    TableDAO.invalidate_cache()
+    TimeSlotUserDAO.invalidate_cache()
+    BookingDAO.free_slots_cache.clear()
+    availability_index.is_warm = False
+    booking_stats.is_warm = False
@@ -0,0 +1,80 @@
+import pytest
+from app.bot.booking.schemas import STable
+from app.dao.dao import TableDAO
+from app.dao.models import Table
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_upsert_many_reseeds_in_place(session_maker):
+    async with session_maker() as session:
+        dao = TableDAO(session)
+        await dao.upsert_many(
+            [{'id': table_id, 'capacity': 2, 'description': 'old'}
+             for table_id in range(1, 8)],
+            chunk_size=3
+        )
+        await dao.upsert_many(
+            [{'id': table_id, 'capacity': 4, 'description': 'new'}
+             for table_id in range(5, 11)],
+            chunk_size=3
+        )
+        await session.commit()
+        result = await session.execute(select(Table).order_by(Table.id))
+        rows = [(row.id, row.capacity, row.description)
+                for row in result.scalars()]
+    assert rows == (
+        [(table_id, 2, 'old') for table_id in range(1, 5)]
+        + [(table_id, 4, 'new') for table_id in range(5, 11)]
+    )
+
+
+async def test_add_invalidates_cache_only_after_commit(session_maker):
+    async with session_maker() as session:
+        dao = TableDAO(session)
+        await dao.add_many([{'id': 1, 'capacity': 2}])
+        await session.commit()
+        assert [table.id for table in await dao.find_all()] == [1]
+        await dao.add(STable(id=2, capacity=4, description=None))
+        assert TableDAO.cache.get(('all', ())) is not None
+        await session.rollback()
+        assert TableDAO.cache.get(('all', ())) is not None
+        await dao.add(STable(id=3, capacity=4, description=None))
+        await session.commit()
+        assert TableDAO.cache.get(('all', ())) is None
+
+
+async def test_changes_to_cached_rows_are_saved(session_maker):
+    async with session_maker() as session:
+        await TableDAO(session).add_many([{'id': 1, 'capacity': 2}])
+        await session.commit()
+    for capacity in (3, 4):
+        # Первый проход читает из базы, второй - из кэша.
+        async with session_maker() as session:
+            table = await TableDAO(session).find_one_or_none_by_id(1)
+            assert table in session
+            table.capacity = capacity
+            await session.commit()
+        async with session_maker() as session:
+            result = await session.execute(select(Table.capacity))
+            assert result.scalar_one() == capacity
+
+
+async def test_upsert_many_accepts_rows_with_different_keys(session_maker):
+    async with session_maker() as session:
+        dao = TableDAO(session)
+        await dao.add_many([
+            {'id': 1, 'capacity': 2, 'description': 'old'},
+            {'id': 2, 'capacity': 2},
+        ])
+        await dao.upsert_many([
+            {'id': 1, 'capacity': 6},
+            {'id': 2, 'capacity': 4, 'description': 'new'},
+            {'id': 3, 'capacity': 8},
+        ])
+        await session.commit()
+        result = await session.execute(select(Table).order_by(Table.id))
+        rows = [(row.id, row.capacity, row.description)
+                for row in result.scalars()]
+    assert rows == [(1, 6, 'old'), (2, 4, 'new'), (3, 8, None)]
@@ -0,0 +1,35 @@
+from datetime import date
+
+import pytest
+from app.dao.dao import BookingDAO
+from app.dao.models import Booking, Table, TimeSlot, User
+from app.dao.stats import booking_stats
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_book_count_does_not_warm_stats(session_maker):
+    async with session_maker() as session:
+        session.add_all([
+            User(id=1), Table(id=1, capacity=2),
+            TimeSlot(id=10, start_time='10:00', end_time='11:00'),
+        ])
+        session.add(Booking(
+            user_id=1, table_id=1, time_slot_id=10,
+            date=date(2030, 1, 1), status='booked'
+        ))
+        await session.commit()
+        assert await BookingDAO(session).book_count() == {
+            'booked': 1, 'completed': 0, 'canceled': 0
+        }
+    assert not booking_stats.is_warm
+
+
+async def test_warm_stats_report_known_statuses_without_rows(session_maker):
+    async with session_maker() as session:
+        assert await booking_stats.warm(session) == {
+            'booked': 0, 'completed': 0, 'canceled': 0
+        }
+        assert await BookingDAO(session).book_count() == {
+            'booked': 0, 'completed': 0, 'canceled': 0
+        }
@@ -0,0 +1,62 @@
+import time
+
+import anyio
+import pytest
+from app.bot.broadcast import Broadcaster
+from app.bot.rate_limit import TelegramRateLimiter
+from app.dao.database import Base, engine
+from app.dao.models import User
+from sqlalchemy import insert
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBot:
+    def __init__(self, broken: set[int]):
+        self.broken = broken
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if chat_id in self.broken:
+            raise ValueError('broken chat')
+        self.sent.append(chat_id)
+
+
+def make_broadcaster(bot: FakeBot, **kwargs) -> Broadcaster:
+    limiter = TelegramRateLimiter(global_rate=10000, per_chat_interval=0)
+    return Broadcaster(bot, limiter, **kwargs)
+
+
+async def test_unexpected_error_does_not_stop_workers():
+    bot = FakeBot(broken={1, 2, 3})
+    broadcaster = make_broadcaster(bot, concurrency=2, chunk_size=2)
+    with anyio.fail_after(5):
+        stats = await broadcaster.run('hi', chat_ids=range(1, 21))
+    assert (stats.total, stats.sent, stats.failed) == (20, 17, 3)
+    assert sorted(bot.sent) == list(range(4, 21))
+
+
+@pytest.fixture
+async def users():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [
+            {'id': user_id} for user_id in range(1, 6)
+        ])
+    yield
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+
+
+async def test_recipients_are_read_in_chunks(users):
+    broadcaster = make_broadcaster(FakeBot(broken=set()), chunk_size=2)
+    chunks = [chunk async for chunk in broadcaster._recipients(None)]
+    assert chunks == [[1, 2], [3, 4], [5]]
+
+
+async def test_global_limit_does_not_burst():
+    limiter = TelegramRateLimiter(global_rate=100, per_chat_interval=0)
+    started = time.monotonic()
+    for chat_id in range(21):
+        await limiter.acquire(chat_id)
+    assert time.monotonic() - started >= 0.19
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+from app.bot.booking.schemas import SNewBooking
+from app.dao.dao import BookingDAO
+from app.dao.models import Table, TimeSlot, User
+
+pytestmark = pytest.mark.anyio
+
+DAY = date(2030, 1, 1)
+
+
+@pytest.fixture
+async def venue(session_maker):
+    async with session_maker() as session:
+        session.add_all([User(id=1), Table(id=1, capacity=2)] + [
+            TimeSlot(id=slot_id, start_time=f'{slot_id:02d}:00',
+                     end_time=f'{slot_id + 1:02d}:00')
+            for slot_id in (10, 11)
+        ])
+        await session.commit()
+
+
+async def free_slots(session) -> int:
+    counts = await BookingDAO(session).get_free_slot_counts(1, DAY, DAY)
+    return counts[DAY]
+
+
+async def test_add_and_delete_book_refresh_cached_counts(session_maker, venue):
+    async with session_maker() as session:
+        dao = BookingDAO(session)
+        assert await free_slots(session) == 2
+        booking = await dao.add(SNewBooking(
+            user_id=1, table_id=1, time_slot_id=10, date=DAY, status='booked'
+        ))
+        booking_id = booking.id
+        await session.commit()
+        assert await free_slots(session) == 1
+        await dao.delete_book(booking_id)
+        await session.commit()
+        assert await free_slots(session) == 2
+
+
+async def test_rolled_back_add_keeps_cached_counts(session_maker, venue):
+    async with session_maker() as session:
+        assert await free_slots(session) == 2
+        await BookingDAO(session).add(SNewBooking(
+            user_id=1, table_id=1, time_slot_id=10, date=DAY, status='booked'
+        ))
+        await session.rollback()
+        assert BookingDAO.free_slots_cache.get((1, DAY, DAY)) == {DAY: 2}
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from app.dao.fsm_storage import FSMFlushMiddleware, SQLAlchemyStorage
+from app.dao.models import User
+from sqlalchemy import event, insert
+
+pytestmark = pytest.mark.anyio
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+async def test_write_through_waits_for_update_commit(engine, session_maker):
+    """При flush_interval=0 запись не ждет блокировку сессии апдейта."""
+    storage = SQLAlchemyStorage(engine, flush_interval=0)
+
+    async def handler(event, data):
+        async with session_maker() as session:
+            await session.execute(insert(User).values(id=1))
+            # Сессия держит блокировку записи SQLite до коммита.
+            await storage.set_state(KEY, 'BookingState:confirm')
+            await storage.set_data(KEY, {'table_id': 3})
+            await session.commit()
+
+    await asyncio.wait_for(
+        FSMFlushMiddleware(storage)(handler, None, {}), timeout=2
+    )
+    reloaded = SQLAlchemyStorage(engine)
+    assert await reloaded.get_state(KEY) == 'BookingState:confirm'
+    assert await reloaded.get_data(KEY) == {'table_id': 3}
+
+
+async def test_write_through_outside_update(engine):
+    storage = SQLAlchemyStorage(engine, flush_interval=0)
+    await storage.set_state(KEY, 'BookingState:count')
+    assert await SQLAlchemyStorage(engine).get_state(KEY) == 'BookingState:count'
+
+
+async def test_close_flushes_buffered_writes(engine):
+    storage = SQLAlchemyStorage(engine, flush_interval=60)
+    await storage.set_data(KEY, {'capacity': 2})
+    assert await SQLAlchemyStorage(engine).get_data(KEY) == {}
+    await storage.close()
+    assert await SQLAlchemyStorage(engine).get_data(KEY) == {'capacity': 2}
+
+
+async def test_reads_after_flush_come_from_cache(engine):
+    statements = []
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute',
+        lambda *args: statements.append(args[2])
+    )
+    storage = SQLAlchemyStorage(engine, flush_interval=0)
+    other = StorageKey(bot_id=42, chat_id=2, user_id=2)
+    # Как в апдейте: aiogram читает состояние до хендлера.
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_state(other) is None
+    await storage.set_state(KEY, 'BookingState:count')
+    await storage.set_data(KEY, {'capacity': 2})
+    statements.clear()
+    assert await storage.get_state(KEY) == 'BookingState:count'
+    assert await storage.get_data(KEY) == {'capacity': 2}
+    assert await storage.get_state(other) is None
+    assert statements == []
+
+
+async def test_read_cache_is_bounded(engine):
+    storage = SQLAlchemyStorage(engine, flush_interval=0, cache_size=2)
+    for chat_id in range(1, 5):
+        key = StorageKey(bot_id=42, chat_id=chat_id, user_id=chat_id)
+        await storage.get_state(key)
+        await storage.set_state(key, 'BookingState:count')
+    assert len(storage._records) == 2
+
+
+async def test_update_flushes_only_its_own_keys(engine):
+    storage = SQLAlchemyStorage(engine, flush_interval=0)
+    middleware = FSMFlushMiddleware(storage)
+    other = StorageKey(bot_id=42, chat_id=2, user_id=2)
+    release = asyncio.Event()
+
+    async def slow_handler(event, data):
+        await storage.set_state(other, 'BookingState:date')
+        await release.wait()
+
+    async def handler(event, data):
+        await storage.set_state(KEY, 'BookingState:count')
+
+    slow = asyncio.create_task(middleware(slow_handler, None, {}))
+    await asyncio.sleep(0)
+    await middleware(handler, None, {})
+    reloaded = SQLAlchemyStorage(engine)
+    assert await reloaded.get_state(KEY) == 'BookingState:count'
+    assert await reloaded.get_state(other) is None
+    release.set()
+    await asyncio.wait_for(slow, timeout=2)
+    assert await SQLAlchemyStorage(engine).get_state(other) == 'BookingState:date'
@@ -0,0 +1,46 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджеты с запасом в 3-4 раза от замеров; тяжелые зависимости ловятся
+# отдельно, по списку модулей, а не по времени.
+BUDGETS = {
+    'app.config': (1.0, ('sqlalchemy', 'aiogram', 'faststream', 'apscheduler')),
+    'app.dao.database': (2.0, ('aiogram', 'faststream', 'apscheduler')),
+    'app.bot.create_bot': (10.0, ('faststream', 'apscheduler', 'fastapi')),
+}
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Кумулятивное время импорта каждого модуля в микросекундах."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)', line)
+        if match:
+            profile[match.group(2)] = int(match.group(1))
+    return profile
+
+
+@pytest.mark.parametrize('module', BUDGETS)
+def test_import_budget(module):
+    budget, forbidden = BUDGETS[module]
+    profile = import_profile(module)
+    assert profile[module] / 1e6 < budget
+    heavy = sorted(
+        name for name in profile
+        if name.split('.')[0] in forbidden
+    )
+    assert not heavy, f'{module} imports {heavy[:5]}'
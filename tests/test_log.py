@@ -0,0 +1,47 @@
+import json
+
+import pytest
+from app.config import settings
+from app.log import setup_logging
+from loguru import logger
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def restore_logger():
+    yield
+    logger.remove()
+
+
+@pytest.mark.parametrize('log_json', [False, True])
+async def test_setup_logging_writes_file_in_background(tmp_path, log_json):
+    path = tmp_path / 'log.txt'
+    setup_logging(
+        settings.model_copy(update={'LOG_LEVEL': 'INFO', 'LOG_JSON': log_json}),
+        str(path)
+    )
+    for index in range(100):
+        logger.info('Запись {}', index)
+    await logger.complete()
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 100
+    if log_json:
+        assert json.loads(lines[-1])['record']['message'] == 'Запись 99'
+    else:
+        assert lines[-1].endswith('| INFO | Запись 99')
+
+
+def test_rate_limiter_drops_dao_debug_logs(tmp_path):
+    path = tmp_path / 'log.txt'
+    setup_logging(
+        settings.model_copy(update={
+            'LOG_LEVEL': 'DEBUG', 'LOG_RATE_LIMITS': {'app.dao': 5}
+        }),
+        str(path)
+    )
+    dao_logger = logger.patch(lambda record: record.update(name='app.dao.base'))
+    for index in range(100):
+        dao_logger.debug('Запись {}', index)
+    logger.remove()
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 5
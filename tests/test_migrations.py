@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic(path, *args: str) -> None:
+    subprocess.run(
+        [sys.executable, '-m', 'alembic', *args],
+        cwd=ROOT,
+        env={**os.environ, 'DB_URL': f'sqlite+aiosqlite:///{path}'},
+        capture_output=True,
+        check=True
+    )
+
+
+def test_unique_slot_index_cancels_duplicate_bookings(tmp_path):
+    """Дубли, которые оставила гонка check-then-insert, не ломают upgrade."""
+    path = tmp_path / 'db.sqlite3'
+    alembic(path, 'upgrade', 'bf15d9f7bfde')
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+            INSERT INTO users (id) VALUES (1);
+            INSERT INTO tables (id, capacity) VALUES (1, 2);
+            INSERT INTO time_slot (id, start_time, end_time)
+                VALUES (10, '10:00', '11:00');
+            INSERT INTO bookings (id, user_id, table_id, time_slot_id, date, status)
+            VALUES (1, 1, 1, 10, '2030-01-01', 'canceled'),
+                   (2, 1, 1, 10, '2030-01-01', 'booked'),
+                   (3, 1, 1, 10, '2030-01-01', 'booked'),
+                   (4, 1, 1, 10, '2030-01-01', 'booked'),
+                   (5, 1, 1, 10, '2030-01-02', 'booked');
+        """)
+    alembic(path, 'upgrade', 'head')
+    with sqlite3.connect(path) as connection:
+        statuses = connection.execute(
+            'SELECT id, status FROM bookings ORDER BY id'
+        ).fetchall()
+    assert statuses == [
+        (1, 'canceled'), (2, 'booked'), (3, 'canceled'),
+        (4, 'canceled'), (5, 'booked'),
+    ]
@@ -0,0 +1,107 @@
+import anyio
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from app.bot import notifications
+from app.bot.notifications import (NOTIFICATIONS_BATCH_QUEUE,
+                                   NOTIFICATIONS_QUEUE, NotificationError,
+                                   NotificationSender, notify, notify_batch)
+from app.bot.rate_limit import TelegramRateLimiter
+from faststream.rabbit import RabbitBroker, TestRabbitBroker
+from faststream.rabbit.message import RabbitMessage
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBot:
+    def __init__(self, events: list, broken: set[int] = frozenset()):
+        self.events = events
+        self.broken = broken
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if chat_id in self.broken:
+            raise ValueError('broken chat')
+        self.events.append(('send', chat_id, text))
+
+
+def make_sender(bot) -> NotificationSender:
+    return NotificationSender(
+        bot, TelegramRateLimiter(global_rate=10000, per_chat_interval=0)
+    )
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = RabbitBroker()
+    monkeypatch.setattr(notifications, 'get_broker', lambda: broker)
+    return broker
+
+
+@pytest.fixture
+def events(monkeypatch) -> list:
+    events = []
+
+    async def ack(message, **kwargs):
+        events.append('ack')
+
+    async def reject(message, **kwargs):
+        events.append('reject')
+
+    monkeypatch.setattr(RabbitMessage, 'ack', ack)
+    monkeypatch.setattr(RabbitMessage, 'reject', reject)
+    return events
+
+
+async def test_batch_merges_chat_texts_and_acks_after_send(broker, events):
+    sender = make_sender(FakeBot(events))
+    broker.subscriber(NOTIFICATIONS_BATCH_QUEUE)(sender.handle_batch)
+    async with TestRabbitBroker(broker):
+        with anyio.fail_after(5):
+            await notify_batch(
+                'reminder', [(1, 'first'), (2, 'other'), (1, 'second')]
+            )
+    assert sorted(events[:-1]) == [
+        ('send', 1, 'first\n\nsecond'), ('send', 2, 'other')
+    ]
+    assert events[-1] == 'ack'
+    assert (sender.sent, sender.failed) == (2, 0)
+
+
+async def test_failed_send_is_not_acked(broker, events):
+    sender = make_sender(FakeBot(events, broken={2}))
+    handle = broker.subscriber(NOTIFICATIONS_QUEUE)(sender.handle)
+    async with TestRabbitBroker(broker):
+        with anyio.fail_after(5), pytest.raises(NotificationError):
+            await notify('startup', [1, 2], 'hi')
+        # Ошибку обработчика тестовый брокер хранит и для wait_call.
+        with pytest.raises(NotificationError):
+            await handle.wait_call(1)
+    assert events == [('send', 1, 'hi'), 'reject']
+    assert (sender.sent, sender.failed) == (1, 1)
+
+
+async def test_retry_after_waits_for_limiter(monkeypatch):
+    acquired = []
+    sent = []
+
+    class FloodBot:
+        async def send_message(self, chat_id: int, text: str) -> None:
+            if not sent:
+                sent.append(None)
+                raise TelegramRetryAfter(
+                    SendMessage(chat_id=chat_id, text=text), 'flood', 0
+                )
+            sent.append(text)
+
+    sender = make_sender(FloodBot())
+    acquire = sender.limiter.acquire
+
+    async def counting_acquire(chat_id: int) -> None:
+        acquired.append(chat_id)
+        await acquire(chat_id)
+
+    monkeypatch.setattr(sender.limiter, 'acquire', counting_acquire)
+    with anyio.fail_after(5):
+        await sender.enqueue(1, 'hi')
+    assert sent == [None, 'hi']
+    assert acquired == [1, 1]
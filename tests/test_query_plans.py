@@ -0,0 +1,144 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+from app.dao.dao import BookingDAO
+from app.dao.models import Booking, Table, TimeSlot, User
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TODAY = date.today()
+# Автоматический индекс SQLite строится полным проходом по таблице.
+FULL_SCAN = re.compile(r'\bSCAN bookings\b|bookings USING AUTOMATIC')
+
+
+async def stream_all(dao: BookingDAO):
+    return [booking async for booking in dao.stream_bookings(1)]
+
+
+# book_count нарочно считает всю таблицу, его заменяют счетчики booking_stats.
+CALLS = {
+    'get_available_time_slots': lambda dao: dao.get_available_time_slots(
+        1, TODAY
+    ),
+    'search_tables': lambda dao: dao.search_tables(2, TODAY),
+    'get_free_slot_counts': lambda dao: dao.get_free_slot_counts(
+        1, TODAY, TODAY + timedelta(days=6)
+    ),
+    'get_booking_with_details': lambda dao: dao.get_booking_with_details(1),
+    'get_bookings_page': lambda dao: dao.get_bookings_page(
+        1, after=(TODAY, 1), upcoming_only=True
+    ),
+    'stream_bookings': stream_all,
+    'complete_past_bookings': lambda dao: dao.complete_past_bookings(),
+    'claim_reminders': lambda dao: dao.claim_reminders(
+        datetime.combine(TODAY, datetime.min.time()),
+        datetime.combine(TODAY + timedelta(days=1), datetime.min.time())
+    ),
+    'reserve_slot': lambda dao: dao.reserve_slot(2, 2, TODAY, 11),
+    'cancel_book': lambda dao: dao.cancel_book(1),
+    'delete_book': lambda dao: dao.delete_book(2),
+}
+
+
+@pytest.fixture(scope='module')
+def migrated_db(tmp_path_factory):
+    """База, схему которой создали миграции Alembic, а не create_all."""
+    path = tmp_path_factory.mktemp('migrated') / 'db.sqlite3'
+    subprocess.run(
+        [sys.executable, '-m', 'alembic', 'upgrade', 'head'],
+        cwd=ROOT,
+        env={**os.environ, 'DB_URL': f'sqlite+aiosqlite:///{path}'},
+        capture_output=True,
+        check=True
+    )
+    return path
+
+
+@pytest.fixture
+async def session_maker(migrated_db, tmp_path):
+    path = shutil.copy(migrated_db, tmp_path / 'db.sqlite3')
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add_all([User(id=1), Table(id=1, capacity=2)] + [
+            TimeSlot(
+                id=slot_id,
+                start_time=f'{slot_id:02d}:00',
+                end_time=f'{slot_id + 1:02d}:00'
+            )
+            for slot_id in range(10, 22)
+        ])
+        session.add_all(
+            Booking(
+                user_id=1, table_id=1, time_slot_id=10 + offset % 12,
+                date=TODAY + timedelta(days=offset // 12 - 5),
+                status='booked' if offset % 3 else 'canceled'
+            )
+            for offset in range(120)
+        )
+        await session.commit()
+    yield session_maker
+    await engine.dispose()
+
+
+async def query_plans(session_maker, call) -> list[tuple[list[str], str]]:
+    """Планы всех запросов к bookings, которые выполнил вызов DAO."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'bookings' in statement:
+            statements.append((statement, parameters))
+
+    plans = []
+    async with session_maker() as session:
+        connection = await session.connection()
+        event.listen(connection.sync_engine, 'before_cursor_execute', capture)
+        try:
+            await call(BookingDAO(session))
+        finally:
+            event.remove(
+                connection.sync_engine, 'before_cursor_execute', capture
+            )
+        connection = await session.connection()
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', parameters
+            )
+            plans.append(([row[-1] for row in result.all()], statement))
+        await session.rollback()
+    return plans
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('method', CALLS)
+async def test_dao_method_does_not_scan_bookings(session_maker, method):
+    plans = await query_plans(session_maker, CALLS[method])
+    assert plans, f'{method} did not query bookings'
+    for plan, statement in plans:
+        scans = [step for step in plan if FULL_SCAN.search(step)]
+        assert not scans, f'{method}: {plan}\n{statement}'
+
+
+@pytest.mark.anyio
+async def test_claim_reminders_uses_partial_index(session_maker):
+    """Окно через полночь: оба дня ищутся по ix_bookings_reminder_due."""
+    midnight = datetime.combine(TODAY + timedelta(days=1), datetime.min.time())
+    [(plan, statement)] = await query_plans(
+        session_maker,
+        lambda dao: dao.claim_reminders(
+            midnight - timedelta(hours=3), midnight + timedelta(hours=11)
+        )
+    )
+    searches = [
+        step for step in plan
+        if step.startswith('SEARCH bookings USING INDEX')
+    ]
+    assert len(searches) == 2, f'{plan}\n{statement}'
+    assert all('ix_bookings_reminder_due' in step for step in searches), plan
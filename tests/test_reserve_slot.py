@@ -0,0 +1,56 @@
+import asyncio
+from datetime import date
+
+import pytest
+from app.dao.dao import BookingDAO
+from app.dao.models import Booking, Table, TimeSlot, User
+from sqlalchemy import func, select
+
+pytestmark = pytest.mark.anyio
+
+USERS = 300
+SLOT = (1, date(2030, 1, 1), 10)
+
+
+@pytest.fixture
+async def seeded(session_maker):
+    async with session_maker() as session:
+        session.add_all(
+            [User(id=user_id) for user_id in range(1, USERS + 1)]
+            + [
+                Table(id=1, capacity=4),
+                TimeSlot(id=10, start_time='10:00', end_time='11:00'),
+            ]
+        )
+        await session.commit()
+
+
+async def reserve(session_maker, user_id: int):
+    async with session_maker() as session:
+        reservation = await BookingDAO(session).reserve_slot(user_id, *SLOT)
+        await session.commit()
+        return reservation
+
+
+async def test_parallel_reservations_book_slot_once(session_maker, seeded):
+    reservations = await asyncio.gather(*(
+        reserve(session_maker, user_id) for user_id in range(1, USERS + 1)
+    ))
+    winners = [
+        reservation for reservation in reservations if not reservation.conflict
+    ]
+    assert len(winners) == 1
+    async with session_maker() as session:
+        booked = await session.scalar(
+            select(func.count(Booking.id)).filter_by(status='booked')
+        )
+    assert booked == 1
+
+
+async def test_slot_can_be_reserved_again_after_cancel(session_maker, seeded):
+    first = await reserve(session_maker, 1)
+    assert (await reserve(session_maker, 2)).conflict
+    async with session_maker() as session:
+        assert await BookingDAO(session).cancel_book(first.booking_id) == 1
+        await session.commit()
+    assert not (await reserve(session_maker, 2)).conflict
@@ -0,0 +1,21 @@
+import pytest
+from app.dao.models import Table
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_to_dict_matches_to_dicts(session_maker):
+    async with session_maker() as session:
+        session.add(Table(id=1, capacity=2))
+        await session.commit()
+        table = (await session.execute(select(Table))).scalar_one()
+    row = table.to_dict()
+    assert row == Table.to_dicts([table])[0]
+    assert set(row) == {'id', 'capacity', 'description', 'created_at', 'updated_at'}
+    assert isinstance(row['created_at'], str)
+    assert table.to_dict(exclude_none=True).keys() == row.keys() - {'description'}
+    assert table.to_dict(include={'id', 'capacity'}) == {'id': 1, 'capacity': 2}
+    assert table.to_dict(exclude={'created_at', 'updated_at'}) == {
+        'id': 1, 'capacity': 2, 'description': None
+    }
@@ -0,0 +1,20 @@
+from app.api.webhook import is_telegram_request
+from app.config import settings
+from fastapi import Request
+
+
+def request_with(headers: dict[str, str]) -> Request:
+    return Request({
+        'type': 'http',
+        'headers': [
+            (name.lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+    })
+
+
+def test_webhook_requires_secret_token():
+    header = 'X-Telegram-Bot-Api-Secret-Token'
+    assert is_telegram_request(request_with({header: settings.WEBHOOK_SECRET}))
+    assert not is_telegram_request(request_with({header: 'guess'}))
+    assert not is_telegram_request(request_with({}))
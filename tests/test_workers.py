@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.types import Update
+from app.api.supervisor import WorkerPool
+from app.bot import workers
+from app.bot.workers import WorkerCoordinator
+from app.config import Settings, settings
+from apscheduler.schedulers.base import (STATE_PAUSED, STATE_RUNNING,
+                                         STATE_STOPPED)
+from pydantic import ValidationError
+
+
+class FakeScheduler:
+    state = STATE_RUNNING
+
+    def __init__(self):
+        self.jobs = {}
+
+    def start(self):
+        self.state = STATE_RUNNING
+
+    def pause(self):
+        self.state = STATE_PAUSED
+
+    def shutdown(self, wait=True):
+        self.state = STATE_STOPPED
+        self.shutdown_wait = wait
+
+    def add_job(self, func, trigger, id, **kwargs):
+        self.jobs[id] = func
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = FakeScheduler()
+    monkeypatch.setattr(workers, 'get_scheduler', lambda: scheduler)
+    monkeypatch.setattr(settings, 'HEARTBEAT_INTERVAL', 0.01)
+    return scheduler
+
+
+async def run_leader(coordinator: WorkerCoordinator, tick) -> int:
+    """Возвращает состояние scheduler перед stop."""
+    coordinator.is_leader = True
+    coordinator._lease_deadline = time.monotonic() + 0.05
+    coordinator.tick = tick
+    coordinator.start()
+    await asyncio.sleep(0.2)
+    state = workers.get_scheduler().state
+    await coordinator.stop()
+    return state
+
+
+@pytest.mark.anyio
+async def test_failed_renewal_pauses_scheduler(scheduler):
+    async def tick():
+        raise ConnectionError('database is unavailable')
+
+    coordinator = WorkerCoordinator(None, None)
+    assert await run_leader(coordinator, tick) == STATE_PAUSED
+    assert not coordinator.is_leader
+
+
+@pytest.mark.anyio
+async def test_expired_lease_pauses_scheduler(scheduler):
+    async def tick():
+        await asyncio.sleep(10)
+
+    coordinator = WorkerCoordinator(None, None)
+    assert await run_leader(coordinator, tick) == STATE_PAUSED
+    assert not coordinator.is_leader
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('state', [STATE_RUNNING, STATE_PAUSED])
+async def test_stop_shuts_scheduler_down(scheduler, state):
+    scheduler.state = state
+    await WorkerCoordinator(None, None).stop()
+    assert scheduler.state == STATE_STOPPED
+    assert scheduler.shutdown_wait is False
+
+
+def test_leader_schedules_fsm_cleanup(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, 'FSM_STORAGE', 'sql')
+    scheduler.state = STATE_STOPPED
+    coordinator = WorkerCoordinator(None, None)
+    coordinator.is_leader = True
+    coordinator._sync_scheduler()
+    assert scheduler.state == STATE_RUNNING
+    assert scheduler.jobs['clear_expired_fsm'] is workers.clear_expired_fsm_job
+
+
+def test_workers_require_sql_fsm_storage():
+    with pytest.raises(ValidationError):
+        Settings(WORKERS=2, FSM_STORAGE='memory')
+    assert Settings(WORKERS=2, FSM_STORAGE='sql').WORKERS == 2
+
+
+def test_updates_of_one_chat_go_to_one_worker():
+    pool = WorkerPool(workers=4)
+
+    def update(update_id: int, chat_id: int) -> Update:
+        return Update.model_validate({
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 0,
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': 'u'},
+                'text': '/book'
+            }
+        })
+
+    assert {pool.worker_for(update(i, 1001)) for i in range(20)} == {
+        1001 % 4
+    }
+    assert {pool.worker_for(update(i, chat)) for i, chat in enumerate(
+        range(1000, 1008)
+    )} == {0, 1, 2, 3}